@@ -1,30 +1,113 @@
-# 
+#
 # Author: Jeremy Pedersen (and ChatGPT)
-# Updated: 2023-10-11
+# Updated: 2026-10-19
 #
-# List all snapshots in a given region
+# List all snapshots in a given region (or in every region), along with
+# a summary of snapshot count and size by state, by month, and by source volume
 #
 import boto3
 import argparse
+import csv
+import json
+import sys
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Serialize output from concurrent region workers
+print_lock = threading.Lock()
 
 #############
 # Functions #
 #############
 
-def list_ebs_snapshots(region_name):
-    # Create an EC2 client object using the specified region
+def get_all_regions(region_name):
     ec2_client = boto3.client('ec2', region_name=region_name)
+    return [region['RegionName'] for region in ec2_client.describe_regions()['Regions']]
+
+def new_summary():
+    # Each bucket holds [count, GiB]
+    return {
+        'state': defaultdict(lambda: [0, 0]),
+        'month': defaultdict(lambda: [0, 0]),
+        'volume': defaultdict(lambda: [0, 0]),
+    }
+
+def add_to_summary(summary, snap):
+    size = snap.get('VolumeSize', 0)
+    keys = {
+        'state': snap['State'],
+        'month': snap['StartTime'].strftime('%Y-%m'),
+        'volume': snap.get('VolumeId', 'N/A'),
+    }
+    for group, key in keys.items():
+        bucket = summary[group][key]
+        bucket[0] += 1
+        bucket[1] += size
+
+def merge_summary(total, partial):
+    for group, buckets in partial.items():
+        for key, (count, size) in buckets.items():
+            total[group][key][0] += count
+            total[group][key][1] += size
+
+def print_snapshot(region_name, snap, output_format, writer):
+    row = {
+        'Region': region_name,
+        'SnapshotId': snap['SnapshotId'],
+        'VolumeId': snap.get('VolumeId', 'N/A'),
+        'VolumeSize': snap.get('VolumeSize', 0),
+        'State': snap['State'],
+        'Progress': snap.get('Progress', ''),
+        'StartTime': snap['StartTime'].isoformat(),
+    }
+
+    with print_lock:
+        if output_format == 'json':
+            print(json.dumps(row))
+        elif output_format == 'csv':
+            writer.writerow(row)
+        else:
+            print(f"{row['Region']}  {row['SnapshotId']}  {row['VolumeId']}  {row['VolumeSize']} GiB  {row['State']} ({row['Progress']})  {row['StartTime']}")
+
+def list_ebs_snapshots(region_name, output_format, writer):
+    # Create an EC2 client object using the specified region (one session
+    # per thread, since boto3 sessions are not thread-safe)
+    ec2_client = boto3.session.Session().client('ec2', region_name=region_name)
 
-    # Retrieve snapshots using describe_snapshots method
-    snapshots = ec2_client.describe_snapshots(OwnerIds=['self'])
+    # Stream snapshots page by page, building the summary as we go
+    summary = new_summary()
+    paginator = ec2_client.get_paginator('describe_snapshots')
+    for page in paginator.paginate(OwnerIds=['self']):
+        for snap in page['Snapshots']:
+            print_snapshot(region_name, snap, output_format, writer)
+            add_to_summary(summary, snap)
 
-    # Print the header
-    print(f"Listing all EBS snapshots in region {region_name}:")
+    return summary
+
+def print_summary(summary, output_format):
+    if output_format == 'json':
+        print(json.dumps({
+            'summary': {
+                group: {key: {'count': count, 'gib': size} for key, (count, size) in sorted(buckets.items())}
+                for group, buckets in summary.items()
+            }
+        }))
+        return
+
+    # Keep CSV output clean by sending the summary to stderr
+    out = sys.stderr if output_format == 'csv' else sys.stdout
+    total_count = sum(count for count, _ in summary['state'].values())
+    total_size = sum(size for _, size in summary['state'].values())
+
+    print('=' * 60, file=out)
+    print(f'Total: {total_count} snapshot(s), {total_size} GiB', file=out)
+    for group, title in (('state', 'By state'), ('month', 'By month'), ('volume', 'By source volume')):
+        print('-' * 60, file=out)
+        print(f'{title}:', file=out)
+        for key, (count, size) in sorted(summary[group].items()):
+            print(f'  {key}: {count} snapshot(s), {size} GiB', file=out)
 
-    for snap in snapshots['Snapshots']:
-        print('-' * 60)
-        print(f"Snapshot ID: {snap['SnapshotId']}\nProgress: {snap['Progress']}\nStatus: {snap['State']}")
-        
 ##################
 # The real stuff #
 ##################
@@ -32,9 +115,32 @@ def list_ebs_snapshots(region_name):
 # Use argparse to get the region name from the command line
 parser = argparse.ArgumentParser(description='A script to list all snapshots in a specified region')
 parser.add_argument('-r', '--region', type=str, required=True, help='AWS region name (ex: us-east-1)')
+parser.add_argument('-a', '--all-regions', action='store_true', help='List snapshots in every enabled region (the region given with -r is used to look them up)')
+parser.add_argument('-f', '--format', type=str, choices=['text', 'json', 'csv'], default='text', help='Output format: text, json (one object per line), or csv (default: text)')
+parser.add_argument('-w', '--workers', type=int, default=8, help='Number of regions to query concurrently (default: 8)')
 
 args = parser.parse_args()
 
-list_ebs_snapshots(args.region)
-print('-' * 60)
-print('Done!')
\ No newline at end of file
+regions = get_all_regions(args.region) if args.all_regions else [args.region]
+
+writer = None
+if args.format == 'csv':
+    writer = csv.DictWriter(sys.stdout, fieldnames=['Region', 'SnapshotId', 'VolumeId', 'VolumeSize', 'State', 'Progress', 'StartTime'])
+    writer.writeheader()
+
+if args.format == 'text':
+    print(f"Listing all EBS snapshots in region(s): {', '.join(regions)}")
+
+summary = new_summary()
+with ThreadPoolExecutor(max_workers=args.workers) as executor:
+    futures = {executor.submit(list_ebs_snapshots, region, args.format, writer): region for region in regions}
+    for future in as_completed(futures):
+        try:
+            merge_summary(summary, future.result())
+        except Exception as e:
+            print(f'Unable to list snapshots in region {futures[future]}: {e}', file=sys.stderr)
+
+print_summary(summary, args.format)
+
+if args.format == 'text':
+    print('Done!')
@@ -0,0 +1,252 @@
+#
+# Author: Jeremy Pedersen (and ChatGPT)
+# Updated: 2026-10-19
+#
+# Copy all snapshots (or AMIs) from one region to another, for example
+# to keep DR copies of the snapshots made by ec2-snapshot-all.py
+#
+# AWS limits the number of copies which can be in flight to a single
+# destination region, so the script keeps that many copies running at a
+# time, checks on all of them with a single describe call, and starts a new
+# copy as soon as one finishes.
+#
+# Every copy is tagged with the ID of its source. Anything which already
+# has a copy in the destination region is skipped, and progress is saved to
+# a state file (one per source, destination and type) so that an interrupted
+# run can be resumed.
+#
+import boto3
+import argparse
+import json
+import os
+import re
+import time
+from collections import deque
+
+# describe_snapshots / describe_images accept a limited number of IDs per call
+DESCRIBE_BATCH_SIZE = 200
+
+RESOURCE_TYPES = {
+    'snapshots': {'tag': 'SourceSnapshotId', 'id': 'SnapshotId'},
+    'amis': {'tag': 'SourceImageId', 'id': 'ImageId'},
+}
+
+#############
+# Functions #
+#############
+
+def chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def get_name(resource):
+    tags = {tag['Key']: tag['Value'] for tag in resource.get('Tags', [])}
+    return tags.get('Name') or resource.get('Name') or ''
+
+def list_sources(ec2, resource_type, name_pattern):
+    if resource_type == 'snapshots':
+        paginator = ec2.get_paginator('describe_snapshots')
+        pages = (page['Snapshots'] for page in paginator.paginate(OwnerIds=['self'], Filters=[{'Name': 'status', 'Values': ['completed']}]))
+    else:
+        paginator = ec2.get_paginator('describe_images')
+        pages = (page['Images'] for page in paginator.paginate(Owners=['self'], Filters=[{'Name': 'state', 'Values': ['available']}]))
+
+    id_key = RESOURCE_TYPES[resource_type]['id']
+    sources = {}
+    for page in pages:
+        for resource in page:
+            if name_pattern and not name_pattern.search(get_name(resource)):
+                continue
+            sources[resource[id_key]] = resource
+    return sources
+
+def copy_status(resource_type, resource):
+    # 'done', 'pending' or 'failed', from a destination snapshot or AMI's state
+    if resource_type == 'snapshots':
+        return {'completed': 'done', 'error': 'failed'}.get(resource['State'], 'pending')
+    return {'available': 'done', 'failed': 'failed', 'invalid': 'failed', 'error': 'failed'}.get(resource['State'], 'pending')
+
+def index_existing_copies(ec2, resource_type):
+    # Map source ID -> (destination ID, status), using the tag set on every
+    # copy. Failed copies are left out, so they get copied again, and if a
+    # source has several copies, a finished one wins over a pending one.
+    tag_key = RESOURCE_TYPES[resource_type]['tag']
+    filters = [{'Name': 'tag-key', 'Values': [tag_key]}]
+
+    if resource_type == 'snapshots':
+        paginator = ec2.get_paginator('describe_snapshots')
+        pages = (page['Snapshots'] for page in paginator.paginate(OwnerIds=['self'], Filters=filters))
+    else:
+        paginator = ec2.get_paginator('describe_images')
+        pages = (page['Images'] for page in paginator.paginate(Owners=['self'], Filters=filters))
+
+    id_key = RESOURCE_TYPES[resource_type]['id']
+    index = {}
+    for page in pages:
+        for resource in page:
+            status = copy_status(resource_type, resource)
+            if status == 'failed':
+                continue
+            tags = {tag['Key']: tag['Value'] for tag in resource.get('Tags', [])}
+            if index.get(tags[tag_key], (None, None))[1] != 'done':
+                index[tags[tag_key]] = (resource[id_key], status)
+    return index
+
+def start_copy(ec2, resource_type, source_region, source):
+    tag_key = RESOURCE_TYPES[resource_type]['tag']
+    name = get_name(source)
+
+    if resource_type == 'snapshots':
+        tags = [{'Key': tag_key, 'Value': source['SnapshotId']}]
+        if name:
+            tags.append({'Key': 'Name', 'Value': name})
+        response = ec2.copy_snapshot(
+            SourceRegion=source_region,
+            SourceSnapshotId=source['SnapshotId'],
+            Description=f"Copy of {source['SnapshotId']} from {source_region}",
+            TagSpecifications=[{'ResourceType': 'snapshot', 'Tags': tags}]
+        )
+        return response['SnapshotId']
+
+    tags = [{'Key': tag_key, 'Value': source['ImageId']}]
+    response = ec2.copy_image(
+        SourceRegion=source_region,
+        SourceImageId=source['ImageId'],
+        Name=source.get('Name') or source['ImageId'],
+        Description=f"Copy of {source['ImageId']} from {source_region}",
+        CopyImageTags=True,
+        TagSpecifications=[{'ResourceType': 'image', 'Tags': tags}]
+    )
+    return response['ImageId']
+
+def poll_copies(ec2, resource_type, dest_ids):
+    # Returns {dest_id: 'done' | 'pending' | 'failed' | 'missing'}, with one
+    # describe call per batch. Filtering by ID (rather than asking for the IDs
+    # directly) means a copy which has since been deleted is simply missing
+    # from the results, instead of failing the whole call.
+    states = {}
+    for batch in chunks(dest_ids, DESCRIBE_BATCH_SIZE):
+        if resource_type == 'snapshots':
+            paginator = ec2.get_paginator('describe_snapshots')
+            pages = (page['Snapshots'] for page in paginator.paginate(Filters=[{'Name': 'snapshot-id', 'Values': batch}]))
+        else:
+            paginator = ec2.get_paginator('describe_images')
+            pages = (page['Images'] for page in paginator.paginate(Filters=[{'Name': 'image-id', 'Values': batch}]))
+        id_key = RESOURCE_TYPES[resource_type]['id']
+        for page in pages:
+            for resource in page:
+                states[resource[id_key]] = copy_status(resource_type, resource)
+        for dest_id in batch:
+            states.setdefault(dest_id, 'missing')
+    return states
+
+def load_state(state_file, source_region, dest_region, resource_type):
+    # The state only makes sense for the same source, destination and type, so
+    # it records them, and a state file for anything else is refused
+    run = {'source': source_region, 'destination': dest_region, 'type': resource_type}
+    if not os.path.exists(state_file):
+        return {**run, 'completed': {}, 'in_flight': {}, 'failed': {}}
+    with open(state_file) as f:
+        state = json.load(f)
+    saved = {key: state.get(key) for key in run}
+    if saved != run:
+        raise ValueError(f"{state_file} is for copying {saved['type']} from {saved['source']} to {saved['destination']}, "
+                         f"not {resource_type} from {source_region} to {dest_region}")
+    return state
+
+def save_state(state_file, state):
+    # Write to a temporary file first so an interruption can't corrupt the state
+    with open(f'{state_file}.tmp', 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(f'{state_file}.tmp', state_file)
+
+def replicate(source_region, dest_region, resource_type, name_pattern, max_concurrent, poll_interval, state_file):
+    source_ec2 = boto3.client('ec2', region_name=source_region)
+    dest_ec2 = boto3.client('ec2', region_name=dest_region)
+
+    try:
+        state = load_state(state_file, source_region, dest_region, resource_type)
+    except ValueError as e:
+        raise SystemExit(f'Unable to resume: {e}. Use a different --state-file.')
+    sources = list_sources(source_ec2, resource_type, name_pattern)
+    existing = index_existing_copies(dest_ec2, resource_type)
+
+    # The destination is the source of truth: a copy recorded as completed
+    # which has since been deleted there gets copied again
+    for source_id in list(state['completed']):
+        if existing.get(source_id, (None, None))[1] != 'done':
+            del state['completed'][source_id]
+
+    # Anything already copied (by this or an earlier run) counts as completed,
+    # and copies still in progress (say the state file was lost) are waited on
+    in_flight_sources = set(state['in_flight'].values())
+    for source_id, (dest_id, status) in existing.items():
+        if source_id not in sources or source_id in in_flight_sources:
+            continue
+        if status == 'done':
+            state['completed'][source_id] = dest_id
+        elif source_id not in state['completed']:
+            state['in_flight'][dest_id] = source_id
+            in_flight_sources.add(source_id)
+
+    queue = deque(source_id for source_id in sources if source_id not in state['completed'] and source_id not in in_flight_sources)
+    print(f"Found {len(sources)} {resource_type} in {source_region}: {len(state['completed'])} already copied, {len(state['in_flight'])} in flight, {len(queue)} to copy")
+
+    while queue or state['in_flight']:
+        # Keep the pipeline full
+        while queue and len(state['in_flight']) < max_concurrent:
+            source_id = queue.popleft()
+            try:
+                dest_id = start_copy(dest_ec2, resource_type, source_region, sources[source_id])
+                state['in_flight'][dest_id] = source_id
+                state['failed'].pop(source_id, None)
+                print(f'Copying {source_id} -> {dest_id}')
+            except dest_ec2.exceptions.ClientError as e:
+                if e.response['Error']['Code'] in ('ResourceLimitExceeded', 'RequestLimitExceeded', 'Throttling'):
+                    # Hit the concurrent copy limit, try again after the next poll
+                    queue.appendleft(source_id)
+                    break
+                print(f'Unable to copy {source_id}: {e}')
+                state['failed'][source_id] = str(e)
+        save_state(state_file, state)
+
+        time.sleep(poll_interval)
+        if not state['in_flight']:
+            continue
+
+        # Check on every in-flight copy at once
+        states = poll_copies(dest_ec2, resource_type, list(state['in_flight']))
+        for dest_id, status in states.items():
+            if status == 'pending':
+                continue
+            source_id = state['in_flight'].pop(dest_id)
+            if status == 'done':
+                state['completed'][source_id] = dest_id
+                print(f'Finished copying {source_id} -> {dest_id}')
+            elif status == 'missing':
+                state['failed'][source_id] = f'Copy {dest_id} no longer exists'
+                print(f'Copy of {source_id} ({dest_id}) no longer exists')
+            else:
+                state['failed'][source_id] = f'Copy {dest_id} failed'
+                print(f'Copy of {source_id} ({dest_id}) failed')
+        save_state(state_file, state)
+
+        print(f"Progress: {len(state['completed'])} copied, {len(state['in_flight'])} in flight, {len(queue)} queued, {len(state['failed'])} failed")
+
+##################
+# The real stuff #
+##################
+
+parser = argparse.ArgumentParser(description='Copy all snapshots or AMIs in one region to another region.')
+parser.add_argument('-r', '--region', type=str, required=True, help='Source AWS region (ex: us-east-1)')
+parser.add_argument('-d', '--destination', type=str, required=True, help='Destination AWS region (ex: us-west-2)')
+parser.add_argument('-t', '--type', type=str, choices=list(RESOURCE_TYPES), default='snapshots', help='What to copy: snapshots or amis (default: snapshots)')
+parser.add_argument('-p', '--pattern', type=re.compile, help='Only copy resources whose name matches this regex')
+parser.add_argument('-c', '--max-concurrent', type=int, default=20, help='Maximum number of copies in flight at once (default: 20, the default per-region quota)')
+parser.add_argument('-i', '--poll-interval', type=int, default=30, help='Seconds between progress checks (default: 30)')
+parser.add_argument('-s', '--state-file', type=str, help='File used to save progress, so a run can be resumed (default: replicate-state-<region>-<destination>-<type>.json)')
+args = parser.parse_args()
+
+state_file = args.state_file or f'replicate-state-{args.region}-{args.destination}-{args.type}.json'
+replicate(args.region, args.destination, args.type, args.pattern, args.max_concurrent, args.poll_interval, state_file)
+print('Done!')
@@ -1,33 +1,111 @@
-# 
+#
 # Author: Jeremy Pedersen (and ChatGPT)
-# Updated: 2023-10-11
+# Updated: 2026-10-19
 #
 # Stop all the EC2 instances in a specified AWS region.
 #
+# Instances are stopped with batched StopInstances calls. Large fleets can be
+# stopped in waves (--wave-size), and the script can optionally wait (--wait,
+# up to --wait-timeout per wave) until every instance has actually reached the
+# 'stopped' state.
+#
 import boto3
 import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# describe_instance_status accepts at most 100 instance IDs per call
+STATUS_BATCH_SIZE = 100
+
+# States from which an instance being stopped will never reach 'stopped'
+FAILED_STATES = ('terminated',)
 
 #############
 # Functions #
 #############
 
-def stop_all_ec2_instances(region):
-    # Initialize a session using Amazon EC2
-    session = boto3.session.Session(region_name=region)
-    ec2_resource = session.resource('ec2')
+def chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def get_instance_ids(ec2_client, state):
+    instance_ids = []
+    paginator = ec2_client.get_paginator('describe_instances')
+    for page in paginator.paginate(Filters=[{'Name': 'instance-state-name', 'Values': [state]}]):
+        for reservation in page['Reservations']:
+            instance_ids.extend(instance['InstanceId'] for instance in reservation['Instances'])
+    return instance_ids
+
+def stop_batch(ec2_client, instance_ids):
+    try:
+        ec2_client.stop_instances(InstanceIds=instance_ids)
+        return []
+    except Exception as e:
+        print(f"Unable to stop instances {', '.join(instance_ids)}: {e}")
+        return instance_ids
+
+def wait_for_state(ec2_client, instance_ids, target_state, failed_states, poll_interval, timeout, workers):
+    # Returns the instances which didn't make it: those which ended up in one
+    # of failed_states, and those still pending when the timeout runs out
+    pending = set(instance_ids)
+    failed = []
+    deadline = time.monotonic() + timeout
+
+    def poll(batch):
+        response = ec2_client.describe_instance_status(InstanceIds=batch, IncludeAllInstances=True)
+        return [(status['InstanceId'], status['InstanceState']['Name']) for status in response['InstanceStatuses']]
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while pending:
+            # Give the API a moment to reflect the new state before the first
+            # check, so an instance isn't mistaken for one which failed
+            time.sleep(poll_interval)
+            for statuses in executor.map(poll, chunks(sorted(pending), STATUS_BATCH_SIZE)):
+                for instance_id, state in statuses:
+                    if state == target_state:
+                        pending.discard(instance_id)
+                    elif state in failed_states:
+                        print(f'Instance {instance_id} is {state}, it will not reach state {target_state}')
+                        pending.discard(instance_id)
+                        failed.append(instance_id)
+            if pending and time.monotonic() >= deadline:
+                print(f"Gave up waiting after {timeout}s for {len(pending)} instance(s) to reach state {target_state}: {', '.join(sorted(pending))}")
+                failed.extend(sorted(pending))
+                break
+            if pending:
+                print(f'Waiting for {len(pending)} instance(s) to reach state {target_state}...')
+    return failed
+
+def stop_all_ec2_instances(region, batch_size, wave_size, wave_delay, wait, poll_interval, wait_timeout, workers):
+    ec2_client = boto3.client('ec2', region_name=region)
 
     # List all running instances
-    instances = ec2_resource.instances.filter(
-        Filters=[{
-            'Name': 'instance-state-name',
-            'Values': ['running']
-        }]
-    )
-
-    # Stop the instances
-    for instance in instances:
-        print(f"Stopping instance {instance.id} in region {region}...")
-        instance.stop()
+    instance_ids = get_instance_ids(ec2_client, 'running')
+    if not instance_ids:
+        print(f'No running instances in region {region} to stop.')
+        return
+
+    print(f'Stopping {len(instance_ids)} instance(s) in region {region}...')
+
+    failed = []
+    waves = list(chunks(instance_ids, wave_size or len(instance_ids)))
+    for number, wave in enumerate(waves, start=1):
+        if len(waves) > 1:
+            print(f'Wave {number}/{len(waves)}: stopping {len(wave)} instance(s)...')
+
+        # Stop the instances, one StopInstances call per batch
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(lambda batch: stop_batch(ec2_client, batch), chunks(wave, batch_size)))
+        wave_failed = [instance_id for result in results for instance_id in result]
+        failed.extend(wave_failed)
+
+        if wait:
+            skipped = set(wave_failed)
+            failed.extend(wait_for_state(ec2_client, [i for i in wave if i not in skipped], 'stopped', FAILED_STATES, poll_interval, wait_timeout, workers))
+        elif number < len(waves) and wave_delay:
+            time.sleep(wave_delay)
+
+    print(f'Stopped {len(instance_ids) - len(failed)} instance(s), {len(failed)} failed.')
 
 ##################
 # The real stuff #
@@ -36,8 +114,15 @@ def stop_all_ec2_instances(region):
 # Parse the command-line arguments
 parser = argparse.ArgumentParser(description='Stop all EC2 instances in a specified AWS region.')
 parser.add_argument('-r', '--region', type=str, required=True, help="AWS region name (ex: us-west-2)")
+parser.add_argument('-b', '--batch-size', type=int, default=100, help='Number of instances per StopInstances call (default: 100)')
+parser.add_argument('-s', '--wave-size', type=int, default=0, help='Stop instances in waves of this many instances (default: all at once)')
+parser.add_argument('-d', '--wave-delay', type=int, default=0, help='Seconds to pause between waves when not using --wait (default: 0)')
+parser.add_argument('-w', '--wait', action='store_true', help="Wait until every instance has reached the 'stopped' state (waits between waves, too)")
+parser.add_argument('-p', '--poll-interval', type=int, default=15, help='Seconds between status checks when waiting (default: 15)')
+parser.add_argument('--wait-timeout', type=int, default=900, help='Seconds to wait for each wave before giving up on the instances still pending (default: 900)')
+parser.add_argument('-t', '--threads', type=int, default=8, help='Number of concurrent API calls (default: 8)')
 args = parser.parse_args()
 
 # Stop all instances in the given region
-stop_all_ec2_instances(args.region)
-print('Done!')
\ No newline at end of file
+stop_all_ec2_instances(args.region, args.batch_size, args.wave_size, args.wave_delay, args.wait, args.poll_interval, args.wait_timeout, args.threads)
+print('Done!')
@@ -1,39 +1,106 @@
-# 
+#
 # Author: Jeremy Pedersen (and ChatGPT)
-# Updated: 2023-10-10
+# Updated: 2026-10-19
 #
 # Given an AWS region as input, terminate all the stopped
 # instances in the region which match a pattern. If no pattern
 # is given, simply terminate all stopped instances.
 #
+# Instances can be matched by a regex against their Name tag (--pattern),
+# by a regex against any other tag (--tag Key=regex), and by how long they
+# have been stopped (--stopped-days), using the stop time recorded in
+# the instance's StateTransitionReason.
+#
 import boto3
 import argparse
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+
+# Stop time looks like: "User initiated (2023-10-10 12:34:56 GMT)"
+STOP_TIME_PATTERN = re.compile(r'\((\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}) GMT\)')
+
+#############
+# Functions #
+#############
+
+def chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def get_stop_time(instance):
+    match = STOP_TIME_PATTERN.search(instance.get('StateTransitionReason', ''))
+    if not match:
+        return None
+    return datetime.strptime(match.group(1), '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
+
+def instance_matches(instance, name_pattern, tag_patterns, stopped_before):
+    tags = {tag['Key']: tag['Value'] for tag in instance.get('Tags', [])}
+
+    if name_pattern and not name_pattern.search(tags.get('Name', '')):
+        return False
+
+    for key, pattern in tag_patterns:
+        if key not in tags or not pattern.search(tags[key]):
+            return False
 
-def terminate_stopped_ec2_instances(region):
+    if stopped_before:
+        # If we can't tell when the instance was stopped, leave it alone
+        stop_time = get_stop_time(instance)
+        if stop_time is None or stop_time > stopped_before:
+            return False
+
+    return True
+
+def terminate_batch(ec2, instance_ids):
+    ec2.terminate_instances(InstanceIds=instance_ids)
+    return instance_ids
+
+def terminate_stopped_ec2_instances(region, name_pattern, tag_patterns, stopped_days, batch_size, workers, dry_run):
     # Create EC2 client
     ec2 = boto3.client('ec2', region_name=region)
 
-    # Fetch all instances in the 'stopped' state
-    response = ec2.describe_instances(
-        Filters=[{
-            'Name': 'instance-state-name',
-            'Values': ['stopped']
-        }]
-    )
+    stopped_before = None
+    if stopped_days is not None:
+        stopped_before = datetime.now(timezone.utc) - timedelta(days=stopped_days)
 
+    # Fetch all instances in the 'stopped' state
     instances_to_terminate = []
-    for reservation in response['Reservations']:
-        for instance in reservation['Instances']:
-            instances_to_terminate.append(instance['InstanceId'])
+    paginator = ec2.get_paginator('describe_instances')
+    for page in paginator.paginate(Filters=[{'Name': 'instance-state-name', 'Values': ['stopped']}]):
+        for reservation in page['Reservations']:
+            for instance in reservation['Instances']:
+                if instance_matches(instance, name_pattern, tag_patterns, stopped_before):
+                    instances_to_terminate.append(instance['InstanceId'])
 
     if not instances_to_terminate:
-        print(f'No stopped instances to terminate in the region: {region}')
+        print(f'No matching stopped instances to terminate in the region: {region}')
         return
 
-    # Terminate instances
-    print(f"Terminating stopped instances: {', '.join(instances_to_terminate)}")
-    ec2.terminate_instances(InstanceIds=instances_to_terminate)
-    print('Stopped instances terminated successfully!')
+    if dry_run:
+        print(f"Would terminate stopped instances: {', '.join(instances_to_terminate)}")
+        return
+
+    # Terminate instances, one batch per call, isolating errors to the batch that caused them
+    terminated = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(terminate_batch, ec2, batch): batch for batch in chunks(instances_to_terminate, batch_size)}
+        for future in as_completed(futures):
+            batch = futures[future]
+            try:
+                future.result()
+                terminated += len(batch)
+                print(f"Terminating stopped instances: {', '.join(batch)}")
+            except Exception as e:
+                print(f"Unable to terminate instances {', '.join(batch)}: {e}")
+
+    print(f'Terminated {terminated} of {len(instances_to_terminate)} stopped instance(s)')
+
+def parse_tag_pattern(value):
+    if '=' not in value:
+        raise argparse.ArgumentTypeError(f"Tag filter '{value}' should look like Key=regex")
+    key, pattern = value.split('=', 1)
+    return key, re.compile(pattern)
 
 ##################
 # The real stuff #
@@ -41,7 +108,13 @@ def terminate_stopped_ec2_instances(region):
 
 parser = argparse.ArgumentParser(description='Terminate all stopped EC2 instances in a specified region.')
 parser.add_argument('-r', '--region', type=str, required=True, help='AWS region name (ex: us-west-2)')
+parser.add_argument('-p', '--pattern', type=re.compile, help='Only terminate instances whose Name tag matches this regex (ex: ^workshop-)')
+parser.add_argument('-t', '--tag', type=parse_tag_pattern, action='append', default=[], help='Only terminate instances with a tag matching Key=regex (can be repeated)')
+parser.add_argument('-d', '--stopped-days', type=float, help='Only terminate instances which have been stopped for more than this many days')
+parser.add_argument('-b', '--batch-size', type=int, default=100, help='Number of instances per TerminateInstances call (default: 100)')
+parser.add_argument('-w', '--workers', type=int, default=4, help='Number of concurrent TerminateInstances calls (default: 4)')
+parser.add_argument('--dry-run', action='store_true', help='List the instances which would be terminated, without terminating them')
 
 args = parser.parse_args()
-terminate_stopped_ec2_instances(args.region)
-print('Done!')
\ No newline at end of file
+terminate_stopped_ec2_instances(args.region, args.pattern, args.tag, args.stopped_days, args.batch_size, args.workers, args.dry_run)
+print('Done!')
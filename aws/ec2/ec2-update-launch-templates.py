@@ -1,45 +1,76 @@
-# 
+#
 # Author: Jeremy Pedersen (and ChatGPT)
-# Updated: 2023-10-13
+# Updated: 2026-10-19
 #
 # Given an AWS region as input, update all the launch templates
 # in the region to use the latest version and delete all older versions.
 #
 import boto3
 import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# delete_launch_template_versions accepts at most 200 versions per call
+DELETE_BATCH_SIZE = 200
 
 #############
 # Functions #
 #############
 
-def set_default_to_latest_and_delete_old_versions(region_name):
-    # Create an EC2 client
-    ec2 = boto3.client('ec2', region_name=region_name)
+def chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
 
-    # Get all launch templates in the region
-    response = ec2.describe_launch_templates()
-    launch_templates = response['LaunchTemplates']
+def get_existing_versions(ec2, launch_template_id):
+    versions = []
+    paginator = ec2.get_paginator('describe_launch_template_versions')
+    for page in paginator.paginate(LaunchTemplateId=launch_template_id):
+        versions.extend(version['VersionNumber'] for version in page['LaunchTemplateVersions'])
+    return versions
+
+def update_launch_template(ec2, lt):
+    launch_template_id = lt['LaunchTemplateId']
+    latest_version_number = lt['LatestVersionNumber']
 
-    for lt in launch_templates:
-        launch_template_id = lt['LaunchTemplateId']
-        latest_version_number = lt['LatestVersionNumber']
+    # Set default version to the latest version
+    ec2.modify_launch_template(
+        LaunchTemplateId=launch_template_id,
+        DefaultVersion=str(latest_version_number)
+    )
 
-        # Set default version to the latest version
-        ec2.modify_launch_template(
+    # Delete all older versions which still exist, as few calls as possible
+    old_versions = [str(v) for v in get_existing_versions(ec2, launch_template_id) if v != latest_version_number]
+    deleted = 0
+    for batch in chunks(old_versions, DELETE_BATCH_SIZE):
+        response = ec2.delete_launch_template_versions(
             LaunchTemplateId=launch_template_id,
-            DefaultVersion=str(latest_version_number)
+            Versions=batch
         )
+        deleted += len(response.get('SuccessfullyDeletedLaunchTemplateVersions', []))
+        for failure in response.get('UnsuccessfullyDeletedLaunchTemplateVersions', []):
+            print(f"Error deleting version {failure['VersionNumber']} of {launch_template_id}. Error: {failure['ResponseError']['Message']}")
+
+    return deleted
+
+def set_default_to_latest_and_delete_old_versions(region_name, workers):
+    # Create an EC2 client
+    ec2 = boto3.client('ec2', region_name=region_name)
+
+    # Get all launch templates in the region
+    launch_templates = []
+    paginator = ec2.get_paginator('describe_launch_templates')
+    for page in paginator.paginate():
+        launch_templates.extend(page['LaunchTemplates'])
 
-        # Delete all older versions
-        for version_number in range(1, latest_version_number):
+    # Process the templates concurrently
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(update_launch_template, ec2, lt): lt['LaunchTemplateId'] for lt in launch_templates}
+        for future in as_completed(futures):
+            launch_template_id = futures[future]
             try:
-                ec2.delete_launch_template_versions(
-                    LaunchTemplateId=launch_template_id,
-                    Versions=[str(version_number)]
-                )
+                deleted = future.result()
+                print(f'Updated {launch_template_id}, deleted {deleted} old version(s)')
             except ec2.exceptions.ClientError as e:
-                # Handle cases where the version might have been deleted previously
-                print(f'Error deleting version {version_number} of {launch_template_id}. Error: {str(e)}')
+                print(f'Error updating {launch_template_id}. Error: {str(e)}')
 
     print(f'Processed {len(launch_templates)} launch template(s) in {region_name}')
 
@@ -49,6 +80,7 @@ def set_default_to_latest_and_delete_old_versions(region_name):
 
 parser = argparse.ArgumentParser(description='Update AWS launch templates in the given region.')
 parser.add_argument('-r', '--region', type=str, required=True, help='AWS region name (ex: us-west-1)')
+parser.add_argument('-w', '--workers', type=int, default=8, help='Number of launch templates to process concurrently (default: 8)')
 args = parser.parse_args()
 
-set_default_to_latest_and_delete_old_versions(args.region)
+set_default_to_latest_and_delete_old_versions(args.region, args.workers)
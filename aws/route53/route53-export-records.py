@@ -1,56 +1,202 @@
 #
 # Author: Jeremy Pedersen (and ChatGPT)
-# Updated: 2024-02-04
+# Updated: 2026-10-19
 #
 # Export all the Route 53 records in a hosted zone
 #
+# Records are written out page by page as they are listed, so even zones
+# with hundreds of thousands of records export at the speed of the API,
+# without holding the zone in memory. Output formats:
+#
+#   bind  - a BIND zone file (alias records, and records with a routing
+#           policy such as weighted or failover, which BIND has no equivalent
+#           for, are written as comments)
+#   csv   - one row per record value
+#   jsonl - one Route 53 record set per line, exactly as the API returns it
+#
+# With --all-zones, every hosted zone in the account is exported at once
+# (--workers at a time), one file per zone plus an index.json, into
+# --output-dir. Route 53 allows only 5 API requests per second per account,
+# so all requests share one rate limiter, and throttled requests are retried
+# by botocore.
+#
 import boto3
 import argparse
+import csv
+import json
+import os
+import re
+import threading
+import time
+from botocore.config import Config
 from botocore.exceptions import ClientError
+from concurrent.futures import ThreadPoolExecutor
+
+# list_resource_record_sets returns at most 300 record sets per call
+PAGE_SIZE = 300
 
-# Initialize a Route53 client
-client = boto3.client('route53')
+CSV_HEADER = ['Name', 'Type', 'TTL', 'SetIdentifier', 'AliasTarget', 'Value']
+
+# Route 53's API quota is 5 requests per second, for the whole account
+DEFAULT_RATE = 5
 
 ####################
 # Helper functions #
 ####################
 
-def export_route53_records(hosted_zone_id):
+class RateLimiter:
+    # Spaces calls out so that no more than `rate` start per second, across
+    # all the threads sharing the limiter
+    def __init__(self, rate):
+        self.interval = 1 / rate
+        self.lock = threading.Lock()
+        self.next_call = time.monotonic()
+
+    def wait(self, **kwargs):
+        with self.lock:
+            now = time.monotonic()
+            delay = self.next_call - now
+            self.next_call = max(now, self.next_call) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+def make_client(rate, workers):
+    # Every request the client sends (retries included) waits its turn, and
+    # throttled requests are retried with backoff
+    client = boto3.client('route53', config=Config(max_pool_connections=workers, retries={'max_attempts': 10, 'mode': 'adaptive'}))
+    client.meta.events.register('before-send.route53', RateLimiter(rate).wait)
+    return client
+
+def decode_name(name):
+    # Route 53 escapes some characters in names as octal (ex: '\052' for '*')
+    return re.sub(r'\\(\d{3})', lambda m: chr(int(m.group(1), 8)), name)
+
+def alias_target(record_set):
+    alias = record_set.get('AliasTarget')
+    return f"{alias['DNSName']} ({alias['HostedZoneId']})" if alias else ''
+
+class BindWriter:
+    def __init__(self, f, zone_name):
+        self.f = f
+        f.write(f'$ORIGIN {zone_name}\n')
+
+    def write(self, record_set):
+        name = decode_name(record_set['Name'])
+        # Record sets with a routing policy share a name and type, so as live
+        # records they would merge into one RRset; comment them out instead
+        prefix = ''
+        if 'SetIdentifier' in record_set:
+            self.f.write(f"; {name} {record_set['Type']} SetIdentifier={record_set['SetIdentifier']}\n")
+            prefix = '; '
+        if 'AliasTarget' in record_set:
+            self.f.write(f"; {name} ALIAS {record_set['Type']} -> {alias_target(record_set)}\n")
+        for record in record_set.get('ResourceRecords', []):
+            self.f.write(f"{prefix}{name}\t{record_set.get('TTL', '')}\tIN\t{record_set['Type']}\t{record['Value']}\n")
+
+class CsvWriter:
+    def __init__(self, f, zone_name):
+        self.writer = csv.writer(f)
+        self.writer.writerow(CSV_HEADER)
+
+    def write(self, record_set):
+        row = [decode_name(record_set['Name']), record_set['Type'], record_set.get('TTL', ''), record_set.get('SetIdentifier', ''), alias_target(record_set)]
+        values = [record['Value'] for record in record_set.get('ResourceRecords', [])] or ['']
+        for value in values:
+            self.writer.writerow(row + [value])
+
+class JsonlWriter:
+    def __init__(self, f, zone_name):
+        self.f = f
+
+    def write(self, record_set):
+        self.f.write(json.dumps(record_set) + '\n')
+
+WRITERS = {'bind': BindWriter, 'csv': CsvWriter, 'jsonl': JsonlWriter}
+
+def export_route53_records(client, hosted_zone_id, filename, output_format, zone_name=None, progress_interval=5):
     try:
+        if zone_name is None:
+            zone_name = client.get_hosted_zone(Id=hosted_zone_id)['HostedZone']['Name']
+
         # Initialize pagination
         paginator = client.get_paginator('list_resource_record_sets')
+        page_iterator = paginator.paginate(HostedZoneId=hosted_zone_id, PaginationConfig={'PageSize': PAGE_SIZE})
 
-        # Create a PageIterator from the paginator
-        page_iterator = paginator.paginate(HostedZoneId=hosted_zone_id)
-
-        all_record_sets = []
+        # Write each page out as soon as we have it
+        count = 0
+        start = last_report = time.monotonic()
+        with open(filename, 'w', newline='') as f:
+            writer = WRITERS[output_format](f, zone_name)
+            for page in page_iterator:
+                for record_set in page['ResourceRecordSets']:
+                    writer.write(record_set)
+                count += len(page['ResourceRecordSets'])
 
-        for page in page_iterator:
-            # Retrieve each record set and append to the list
-            for record_set in page['ResourceRecordSets']:
-                print(record_set)  # or process the record_set as needed
-                all_record_sets.append(record_set)
+                now = time.monotonic()
+                if now - last_report >= progress_interval:
+                    last_report = now
+                    print(f'{zone_name} exported {count} record sets ({count / (now - start):.0f} per second)')
 
-        return all_record_sets
+        print(f'Exported {count} record sets from {zone_name} to {filename} in {time.monotonic() - start:.1f}s')
+        return count
 
     except ClientError as e:
-        print(f"An error occurred: {e}")
+        print(f"An error occurred exporting {zone_name or hosted_zone_id}: {e}")
         return None
 
+def export_all_zones(client, output_dir, output_format, workers):
+    # List the hosted zones once, then export them all at once
+    zones = [zone for page in client.get_paginator('list_hosted_zones').paginate() for zone in page['HostedZones']]
+    print(f'Found {len(zones)} hosted zones')
+    os.makedirs(output_dir, exist_ok=True)
+
+    def export_zone(zone):
+        zone_id = zone['Id'].split('/')[-1]
+        # Private and public zones can share a name, so include the ID
+        filename = os.path.join(output_dir, f"{zone['Name'].rstrip('.') or 'root'}-{zone_id}.{output_format}")
+        count = export_route53_records(client, zone_id, filename, output_format, zone['Name'])
+        return {
+            'Id': zone_id,
+            'Name': zone['Name'],
+            'PrivateZone': zone.get('Config', {}).get('PrivateZone', False),
+            'ResourceRecordSetCount': zone.get('ResourceRecordSetCount'),
+            'Exported': count,
+            'File': os.path.basename(filename) if count is not None else None,
+        }
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        index = list(executor.map(export_zone, zones))
+
+    index_file = os.path.join(output_dir, 'index.json')
+    with open(index_file, 'w') as f:
+        json.dump(index, f, indent=2)
+
+    failed = [zone['Name'] for zone in index if zone['Exported'] is None]
+    print(f'Exported {len(index) - len(failed)} of {len(index)} hosted zones, index written to {index_file}')
+    if failed:
+        print(f"Unable to export: {', '.join(failed)}")
+
 ##################
 # The real stuff #
 ##################
 
 # Initialize the argument parser
 parser = argparse.ArgumentParser(description="A script to export all records from a Route53 Hosted Zone")
-parser.add_argument('-z', '--zone-id', type=str, required=True, help='ID of the hosted zone')
+zones = parser.add_mutually_exclusive_group(required=True)
+zones.add_argument('-z', '--zone-id', type=str, help='ID of the hosted zone')
+zones.add_argument('-a', '--all-zones', action='store_true', help='Export every hosted zone in the account, one file per zone')
+parser.add_argument('-f', '--format', type=str, choices=list(WRITERS), default='bind', help='Output format (default: bind)')
+parser.add_argument('-o', '--output', type=str, help='Output file (default: records.<format>)')
+parser.add_argument('-d', '--output-dir', type=str, default='records', help='With --all-zones, the directory to write the zone files and index.json to (default: records)')
+parser.add_argument('-w', '--workers', type=int, default=4, help='With --all-zones, the number of zones to export at once (default: 4)')
+parser.add_argument('--rate', type=float, default=DEFAULT_RATE, help=f'Maximum Route 53 requests per second (default: {DEFAULT_RATE}, the account-wide quota)')
 
 # Parse the command line arguments
 args = parser.parse_args()
 
-# Call the function to export the records
-exported_records = export_route53_records(args.zone_id)
-
-# Write output to file
-with open('records.txt', 'w') as f:
-    f.write(exported_records)
+client = make_client(args.rate, args.workers)
+if args.all_zones:
+    export_all_zones(client, args.output_dir, args.format, args.workers)
+else:
+    # Export the records, straight to the output file
+    export_route53_records(client, args.zone_id, args.output or f'records.{args.format}', args.format)
@@ -0,0 +1,231 @@
+#
+# Author: Jeremy Pedersen (and ChatGPT)
+# Updated: 2026-10-19
+#
+# Benchmark s3-delete-all-objects.py and s3-sign-all-objects.py against a
+# local S3 stand-in (moto), so we know how they scale before pointing them at
+# a real bucket with hundreds of millions of keys.
+#
+# For each bucket size and worker count, the script seeds a synthetic bucket
+# (optionally with several versions per key), runs the script being measured
+# in a subprocess, and reports objects/sec, the number of S3 API calls, and
+# the script's peak RSS. A configurable delay is added to every request, to
+# stand in for the round trip to the real S3.
+#
+# Operations:
+#   list   - s3-delete-all-objects.py --dry-run (listing only)
+#   delete - s3-delete-all-objects.py
+#   sign   - s3-sign-all-objects.py (local presigner)
+#   sign-botocore - s3-sign-all-objects.py --botocore-signer
+#
+# Peak RSS is read from /proc, so it is only reported on Linux. moto's own
+# listing cost grows with bucket size, so at a million keys the absolute
+# numbers say more about moto than about S3; compare worker counts instead.
+#
+# Requires moto with its server extras: pip install 'moto[server]'
+#
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from urllib.parse import parse_qs
+
+from moto.core import DEFAULT_ACCOUNT_ID
+from moto.s3.models import s3_backends
+from moto.server import DomainDispatcherApplication, create_backend_app
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BUCKET_NAME = 'benchmark-bucket'
+
+#############
+# Functions #
+#############
+
+def classify(environ):
+    # Name the S3 operation behind a request, from its method and query string
+    method = environ['REQUEST_METHOD']
+    query = parse_qs(environ.get('QUERY_STRING', ''), keep_blank_values=True)
+    if method == 'POST' and 'delete' in query:
+        return 'DeleteObjects'
+    if method == 'GET' and 'versions' in query:
+        return 'ListObjectVersions'
+    if method == 'GET' and query.get('list-type') == ['2']:
+        return 'ListObjectsV2'
+    if method == 'GET' and 'uploads' in query:
+        return 'ListMultipartUploads'
+    if method == 'GET' and 'lifecycle' in query:
+        return 'GetBucketLifecycleConfiguration'
+    return f'{method} (other)'
+
+class LatencyMiddleware:
+    # Wraps the moto app: counts every request by operation, and sleeps
+    # before answering to simulate network and service latency. moto itself
+    # isn't thread-safe, so requests are handed to it one at a time (the
+    # simulated latency still overlaps).
+    def __init__(self, app, latency):
+        self.app = app
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.app_lock = threading.Lock()
+        self.calls = Counter()
+
+    def __call__(self, environ, start_response):
+        with self.lock:
+            self.calls[classify(environ)] += 1
+        if self.latency:
+            time.sleep(self.latency)
+        with self.app_lock:
+            return list(self.app(environ, start_response))
+
+    def reset(self):
+        with self.lock:
+            calls = self.calls
+            self.calls = Counter()
+        return calls
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+def start_server(port, latency):
+    middleware = LatencyMiddleware(DomainDispatcherApplication(create_backend_app), latency)
+    server = make_server('127.0.0.1', port, middleware, threaded=True, request_handler=QuietRequestHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, middleware
+
+def seed_bucket(keys, versions, fanout):
+    # Write straight into moto's in-memory backend, which is far faster than
+    # going through the API. Keys are spread over '/'-delimited prefixes so
+    # the sharded listing has something to work with.
+    backend = s3_backends[DEFAULT_ACCOUNT_ID]['global']
+    if BUCKET_NAME not in backend.buckets:
+        backend.create_bucket(BUCKET_NAME, 'us-east-1')
+    if versions > 1:
+        backend.put_bucket_versioning(BUCKET_NAME, 'Enabled')
+
+    for i in range(keys):
+        key = f'{i % fanout:03d}/{i % 10}/object-{i:08d}.dat'
+        for _ in range(versions):
+            backend.put_object(BUCKET_NAME, key, b'')
+
+def clear_bucket():
+    backend = s3_backends[DEFAULT_ACCOUNT_ID]['global']
+    if BUCKET_NAME in backend.buckets:
+        backend.buckets[BUCKET_NAME].keys.clear()
+
+def read_peak_rss_mb(pid):
+    # VmHWM is the peak RSS since exec(). (ru_maxrss from wait4() would also
+    # count this process's memory, which the child inherits until it execs.)
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+def run_script(command, env, verbose, poll_interval=0.05):
+    # Run the script in its own process, sampling its peak RSS until it exits
+    output = None if verbose else subprocess.DEVNULL
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable] + command, env=env, cwd=SCRIPT_DIR, stdout=output, stderr=output)
+    peak_rss_mb = None
+    while process.poll() is None:
+        peak_rss_mb = read_peak_rss_mb(process.pid) or peak_rss_mb
+        time.sleep(poll_interval)
+    elapsed = time.perf_counter() - start
+    if process.returncode != 0:
+        print(f"WARNING: {' '.join(command)} exited with status {process.returncode}")
+    return elapsed, peak_rss_mb
+
+def build_command(operation, workers, shard_depth, output_file):
+    if operation in ('list', 'delete'):
+        command = ['s3-delete-all-objects.py', '-b', BUCKET_NAME, '-w', str(workers), '-l', str(workers), '-d', str(shard_depth)]
+        if operation == 'list':
+            command.append('--dry-run')
+        return command
+
+    command = ['s3-sign-all-objects.py', '-b', BUCKET_NAME, '-o', output_file, '-s', str(workers), '-l', str(workers), '-d', str(shard_depth)]
+    if operation == 'sign-botocore':
+        command.append('--botocore-signer')
+    return command
+
+def benchmark(operations, key_counts, versions, worker_counts, latency_ms, shard_depth, fanout, port, verbose):
+    server, middleware = start_server(port, latency_ms / 1000)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Point the scripts at moto, with dummy credentials, and make botocore
+        # use SigV4 for presigning (as it does against real S3 endpoints)
+        config_file = os.path.join(tmp, 'config')
+        with open(config_file, 'w') as f:
+            f.write('[default]\nregion = us-east-1\ns3 =\n    signature_version = s3v4\n')
+        env = dict(os.environ,
+                   AWS_ENDPOINT_URL=f'http://127.0.0.1:{port}',
+                   AWS_ACCESS_KEY_ID='benchmark',
+                   AWS_SECRET_ACCESS_KEY='benchmark',
+                   AWS_CONFIG_FILE=config_file,
+                   AWS_SHARED_CREDENTIALS_FILE=os.path.join(tmp, 'credentials'))
+        output_file = os.path.join(tmp, 'links.csv')
+
+        results = []
+        for keys in key_counts:
+            for operation in operations:
+                # Signing only covers the current version of each key
+                objects = keys if operation.startswith('sign') else keys * versions
+                for workers in worker_counts:
+                    # Deleting empties the bucket, so start from a fresh one each time
+                    clear_bucket()
+                    seed_bucket(keys, versions, fanout)
+                    middleware.reset()
+
+                    elapsed, peak_rss_mb = run_script(build_command(operation, workers, shard_depth, output_file), env, verbose)
+                    calls = middleware.reset()
+                    result = {
+                        'operation': operation,
+                        'keys': keys,
+                        'versions': versions,
+                        'objects': objects,
+                        'workers': workers,
+                        'seconds': round(elapsed, 3),
+                        'objects_per_sec': round(objects / elapsed),
+                        'api_calls': sum(calls.values()),
+                        'api_calls_by_operation': dict(calls),
+                        'peak_rss_mb': round(peak_rss_mb, 1) if peak_rss_mb else None,
+                    }
+                    results.append(result)
+                    print(f"{operation:<14} {keys:>9} {versions:>3} {workers:>4} {result['seconds']:>9.2f} {result['objects_per_sec']:>10} {result['api_calls']:>8} {result['peak_rss_mb'] or 0:>8.1f}")
+
+    server.shutdown()
+    return results
+
+##################
+# The real stuff #
+##################
+
+parser = argparse.ArgumentParser(description='Benchmark the S3 bulk scripts against a local moto S3 server')
+parser.add_argument('-o', '--operations', type=str, nargs='+', choices=['list', 'delete', 'sign', 'sign-botocore'], default=['list', 'delete', 'sign'], help='Operations to benchmark (default: list delete sign)')
+parser.add_argument('-k', '--keys', type=int, nargs='+', default=[10000], help='Bucket sizes to test, in keys (default: 10000)')
+parser.add_argument('-v', '--versions', type=int, default=1, help='Versions per key (default: 1)')
+parser.add_argument('-w', '--workers', type=int, nargs='+', default=[1, 4, 16], help='Worker counts to test (default: 1 4 16)')
+parser.add_argument('-l', '--latency', type=float, default=20, help='Delay added to every S3 request, in milliseconds (default: 20)')
+parser.add_argument('-d', '--shard-depth', type=int, default=1, help='--shard-depth passed to the scripts (default: 1)')
+parser.add_argument('-f', '--fanout', type=int, default=32, help='Number of top-level prefixes to spread keys over (default: 32)')
+parser.add_argument('-p', '--port', type=int, default=5123, help='Port for the local S3 server (default: 5123)')
+parser.add_argument('-j', '--json', type=str, help='Also write the results to this JSON file')
+parser.add_argument('--verbose', action='store_true', help="Show the scripts' own output")
+args = parser.parse_args()
+
+print(f"{'operation':<14} {'keys':>9} {'ver':>3} {'wrk':>4} {'seconds':>9} {'objects/s':>10} {'calls':>8} {'RSS MB':>8}")
+results = benchmark(args.operations, args.keys, args.versions, args.workers, args.latency, args.shard_depth, args.fanout, args.port, args.verbose)
+
+if args.json:
+    with open(args.json, 'w') as f:
+        json.dump(results, f, indent=2)
+print('Done!')
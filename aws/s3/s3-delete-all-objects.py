@@ -1,64 +1,492 @@
 #
 # Author: Jeremy Pedersen (and ChatGPT)
-# Updated: 2023-10-06
+# Updated: 2026-10-19
 #
 # Delete all objects (and versions, and multipart upload fragments)
 # from a bucket
 #
+# Object versions are streamed out of the listing (as compact records, see
+# s3_listing.py) and handed off in batches of 1,000 keys (the delete_objects
+# maximum) to a pool of delete workers, so deletion runs while listing
+# continues. Only a few batches are ever waiting at once, so memory use
+# doesn't grow with the size of the bucket. Keys which S3 reports as failed
+# are retried with backoff.
+#
+# Very large buckets can be split into prefix "shards" (discovered by
+# delimiter listing down to --shard-depth, or given with --shard-prefixes),
+# each of which is listed by its own worker.
+#
+# If you already have S3 Inventory reports for the bucket on local disk,
+# --manifest skips listing entirely and deletes the keys in the reports.
+# Data files given without their manifest.json need --inventory-schema, since
+# the columns depend on how the inventory was configured.
+#
+# For the very largest buckets, '--strategy lifecycle' has S3 expire every
+# object instead (no request charges, but it takes a day or two). Run again
+# with --finish to confirm the bucket is empty and restore the original
+# lifecycle configuration.
+#
+# To clean up many buckets at once (after a workshop, say), use
+# --bucket-pattern instead of --bucket. Matching buckets are emptied
+# concurrently, sharing one pool of delete workers, and --delete-bucket
+# removes each bucket once it is empty.
+#
 import boto3
 import argparse
+import csv
+import fnmatch
+import gzip
+import json
+import os
+import random
+import threading
+import time
+from botocore.config import Config
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote_plus
+
+from s3_listing import ObjectRecord, batches, discover_shards, list_versions
+
+# delete_objects accepts at most 1,000 keys per call
+DELETE_BATCH_SIZE = 1000
+
+# Default numbers of delete and listing workers
+DEFAULT_WORKERS = 16
+DEFAULT_LIST_WORKERS = 8
 
 #############
 # Functions #
 #############
 
-def delete_all_objects(bucket_name):
+class Progress:
+    # Thread-safe counters, with a periodic objects/sec report. Counts are
+    # passed on to the parent (if any), and only reported if interval is set.
+    def __init__(self, interval=5, parent=None):
+        self.lock = threading.Lock()
+        self.start = time.monotonic()
+        self.last_report = self.start
+        self.interval = interval
+        self.parent = parent
+        self.deleted = 0
+        self.failed = 0
+
+    def add(self, deleted, failed=0):
+        if self.parent:
+            self.parent.add(deleted, failed)
+        with self.lock:
+            self.deleted += deleted
+            self.failed += failed
+            now = time.monotonic()
+            if self.interval and now - self.last_report >= self.interval:
+                self.last_report = now
+                print(f'Deleted {self.deleted} objects ({self.rate():.0f} objects/sec)')
+
+    def rate(self):
+        elapsed = time.monotonic() - self.start
+        return self.deleted / elapsed if elapsed > 0 else 0
+
+def resolve_inventory_files(manifest_path, schema):
+    # Returns a list of (csv_path, schema) for an inventory manifest.json, or
+    # for a .csv / .csv.gz data file given directly (with the given schema)
+    if not manifest_path.endswith('.json'):
+        return [(manifest_path, schema)]
+
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+
+    if manifest.get('fileFormat', 'CSV') != 'CSV':
+        raise ValueError(f"{manifest_path}: only CSV inventories are supported, not {manifest['fileFormat']}")
+
+    # The manifest lists data files by their S3 key, so look for them next
+    # to the manifest (as downloaded with 'aws s3 sync') or in a data/ folder
+    base = os.path.dirname(manifest_path)
+    files = []
+    for entry in manifest['files']:
+        candidates = [os.path.join(base, entry['key']), os.path.join(base, 'data', os.path.basename(entry['key'])), os.path.join(base, os.path.basename(entry['key']))]
+        path = next((c for c in candidates if os.path.exists(c)), None)
+        if path is None:
+            raise FileNotFoundError(f"{manifest_path}: can't find inventory file {entry['key']} locally")
+        files.append((path, manifest['fileSchema']))
+    return files
+
+def read_inventory(path, schema, bucket_name, counts):
+    # Stream records out of an inventory .csv or .csv.gz file, one row at a
+    # time. Keys in inventory reports are URL-encoded.
+    columns = [column.strip() for column in schema.split(',')]
+    key_col = columns.index('Key')
+    version_col = columns.index('VersionId') if 'VersionId' in columns else None
+    bucket_col = columns.index('Bucket') if 'Bucket' in columns else None
+    marker_col = columns.index('IsDeleteMarker') if 'IsDeleteMarker' in columns else None
+
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', newline='') as f:
+        for row in csv.reader(f):
+            if bucket_col is not None and row[bucket_col] != bucket_name:
+                continue
+            if marker_col is not None and row[marker_col] == 'true':
+                counts['delete_markers'] += 1
+            version_id = row[version_col] if version_col is not None else ''
+            yield ObjectRecord(unquote_plus(row[key_col]), version_id or None)
+
+def delete_batch(s3_client, bucket_name, batch, progress, max_retries=5):
+    attempt = 0
+    while batch:
+        try:
+            response = s3_client.delete_objects(Bucket=bucket_name, Delete={'Objects': [record.identifier() for record in batch], 'Quiet': True})
+            errors = response.get('Errors', [])
+        except Exception as e:
+            # The whole call failed (botocore has already retried it), so retry every key
+            errors = [{'Key': record.key, 'VersionId': record.version_id, 'Code': type(e).__name__, 'Message': str(e)} for record in batch]
+
+        progress.add(len(batch) - len(errors))
+        if not errors:
+            return
+
+        attempt += 1
+        if attempt > max_retries:
+            for error in errors:
+                print(f"Unable to delete {error['Key']} (version {error.get('VersionId')}): {error.get('Code')} {error.get('Message')}")
+            progress.add(0, len(errors))
+            return
+
+        # Retry only the keys which failed, with exponential backoff and jitter
+        batch = [ObjectRecord(error['Key'], error.get('VersionId') or None) for error in errors]
+        time.sleep(min(30, 2 ** attempt) * random.uniform(0.5, 1.0))
+
+class BucketJob:
+    # One bucket being emptied. Counts its sources still being listed plus its
+    # batches still being deleted, and calls on_empty once both are done.
+    def __init__(self, bucket_name, sources, progress, on_empty):
+        self.bucket_name = bucket_name
+        self.sources = sources
+        self.progress = progress
+        self.on_empty = on_empty
+        self.lock = threading.Lock()
+        self.pending = len(sources)
+        self.result = {}
+
+    def hold(self):
+        with self.lock:
+            self.pending += 1
+
+    def release(self):
+        with self.lock:
+            self.pending -= 1
+            empty = self.pending == 0
+        if empty:
+            self.on_empty(self)
+
+def delete_objects_pipelined(s3_client, jobs, workers, list_workers, dry_run=False):
+    # Each source (a stream of ObjectRecords) is listed by its own thread and fed into
+    # a single pool of delete workers shared by every bucket, so small buckets
+    # finish quickly and big ones get whatever throughput is left. Bound the
+    # number of batches waiting for a worker, so listing can't run arbitrarily
+    # far ahead of deletion.
+    slots = threading.BoundedSemaphore(workers * 2)
+
+    def worker(job, batch):
+        try:
+            if dry_run:
+                job.progress.add(len(batch))
+            else:
+                delete_batch(s3_client, job.bucket_name, batch, job.progress)
+        finally:
+            slots.release()
+            job.release()
+
+    def feed(job, source):
+        try:
+            for batch in batches(source, DELETE_BATCH_SIZE):
+                job.hold()
+                slots.acquire()
+                delete_executor.submit(worker, job, batch)
+        except Exception as e:
+            print(f'Unable to list objects in bucket {job.bucket_name}: {e}')
+        finally:
+            job.release()
+
+    with ThreadPoolExecutor(max_workers=workers) as delete_executor:
+        with ThreadPoolExecutor(max_workers=list_workers) as list_executor:
+            futures = [list_executor.submit(feed, job, source) for job in jobs for source in job.sources]
+            for job in jobs:
+                if not job.sources:
+                    job.on_empty(job)
+            for future in futures:
+                future.result()
+
+def abort_multipart_uploads(s3_client, bucket_name):
+    aborted = 0
+    paginator = s3_client.get_paginator('list_multipart_uploads')
+    for page in paginator.paginate(Bucket=bucket_name):
+        for upload in page.get('Uploads', []):
+            try:
+                s3_client.abort_multipart_upload(
+                    Bucket=bucket_name,
+                    Key=upload['Key'],
+                    UploadId=upload['UploadId']
+                )
+                aborted += 1
+            except Exception as e:
+                print(f"Unable to abort multipart upload {upload['UploadId']} for {upload['Key']}: {e}")
+    return aborted
+
+def find_buckets(pattern):
     s3_client = boto3.client('s3')
+    return sorted(bucket['Name'] for bucket in s3_client.list_buckets()['Buckets'] if fnmatch.fnmatchcase(bucket['Name'], pattern))
+
+def get_sources(s3_client, bucket_name, list_workers, shard_depth, shard_prefixes, inventory_files, counts):
+    # Delete all object versions and delete markers, either straight from
+    # S3 Inventory files (one reader per file) or by listing the bucket
+    if inventory_files:
+        return [read_inventory(path, schema, bucket_name, counts) for path, schema in inventory_files]
+
+    # Split the bucket into prefixes which can be listed in parallel
+    if shard_prefixes:
+        shards = [(prefix, False) for prefix in shard_prefixes]
+    elif shard_depth:
+        shards = discover_shards(s3_client, bucket_name, shard_depth, list_workers, versions=True)
+    else:
+        shards = [('', False)]
+    if len(shards) > 1:
+        print(f'Listing {len(shards)} prefix shards in bucket {bucket_name}')
+
+    return [list_versions(s3_client, bucket_name, prefix, direct_only) for prefix, direct_only in shards]
+
+def is_empty(s3_client, bucket_name, prefixes):
+    # A single-key probe per prefix is enough to tell whether anything is left
+    for prefix in prefixes:
+        response = s3_client.list_object_versions(Bucket=bucket_name, Prefix=prefix, MaxKeys=1)
+        if response.get('Versions') or response.get('DeleteMarkers'):
+            return False
+    return True
+
+def delete_all_objects(bucket_names, workers, list_workers, shard_depth, shard_prefixes, manifests, inventory_schema, delete_bucket, dry_run, max_passes=5):
+    # Size the connection pool to match the number of workers, and let botocore
+    # back off adaptively if S3 asks us to slow down
+    config = Config(max_pool_connections=workers + list_workers, retries={'max_attempts': 10, 'mode': 'adaptive'})
+    s3_client = boto3.client('s3', config=config)
+
+    counts = {'delete_markers': 0}
+    inventory_files = [f for manifest in manifests or [] for f in resolve_inventory_files(manifest, inventory_schema)]
+    if inventory_files:
+        print(f'Reading {len(inventory_files)} inventory file(s) instead of listing the bucket')
+
+    def finish_bucket(job):
+        # Runs once a bucket has no more objects to list or delete. If listing
+        # missed anything (objects written meanwhile, say), go round again.
+        # Otherwise clean up multipart uploads and, if asked, delete the bucket.
+        # This runs in a worker thread whose result nobody reads, so errors are
+        # kept in job.result for the summary instead of being raised.
+        if dry_run:
+            print(f'Would delete {job.progress.deleted} objects and versions from bucket {job.bucket_name}')
+            return
+        try:
+            if not inventory_files and not is_empty(s3_client, job.bucket_name, shard_prefixes or ['']):
+                job.result['again'] = True
+                return
+            job.result['again'] = False
+            job.result['elapsed'] = time.monotonic() - job.progress.start
+            job.result['aborted'] = abort_multipart_uploads(s3_client, job.bucket_name)
+        except Exception as e:
+            job.result['again'] = False
+            job.result['error'] = str(e)
+            print(f'Unable to finish emptying bucket {job.bucket_name}: {e}')
+            return
+        job.result['bucket_deleted'] = False
+        if delete_bucket and job.progress.failed == 0:
+            try:
+                s3_client.delete_bucket(Bucket=job.bucket_name)
+                job.result['bucket_deleted'] = True
+            except Exception as e:
+                job.result['error'] = str(e)
+                print(f'Unable to delete bucket {job.bucket_name}: {e}')
+        print(f"Emptied bucket {job.bucket_name}: {job.progress.deleted} objects in {job.result['elapsed']:.1f}s")
+
+    progress = Progress()
+    jobs = {}
+    remaining = bucket_names
+    for attempt in range(max_passes):
+        if attempt:
+            print(f"Objects remain in {', '.join(remaining)}, starting pass {attempt + 1}")
+        passes = []
+        for bucket_name in remaining:
+            sources = get_sources(s3_client, bucket_name, list_workers, shard_depth if not attempt else 0, shard_prefixes, inventory_files, counts)
+            bucket_progress = jobs[bucket_name].progress if bucket_name in jobs else Progress(interval=None, parent=progress)
+            jobs[bucket_name] = BucketJob(bucket_name, sources, bucket_progress, finish_bucket)
+            passes.append(jobs[bucket_name])
+
+        delete_objects_pipelined(s3_client, passes, workers, list_workers, dry_run)
+        remaining = [job.bucket_name for job in passes if job.result.get('again')]
+        if not remaining:
+            break
+
+    # Summarize
+    print('=' * 30)
+    if dry_run:
+        print(f'Found {progress.deleted} objects and versions to delete ({progress.rate():.0f} objects/sec), nothing was deleted.')
+        return
+    for job in jobs.values():
+        if job.result.get('error'):
+            status = f", FAILED: {job.result['error']}"
+        elif job.result.get('again'):
+            status = ', NOT EMPTY'
+        elif job.result.get('bucket_deleted'):
+            status = ', bucket deleted'
+        else:
+            status = ''
+        print(f"{job.bucket_name}: deleted {job.progress.deleted} objects and versions ({job.progress.rate():.0f} objects/sec), "
+              f"{job.progress.failed} failed, aborted {job.result.get('aborted', 0)} multipart uploads{status}")
+    print('=' * 30)
+    print(f'Deleted {progress.deleted} objects and versions in total ({progress.rate():.0f} objects/sec).')
+    if inventory_files:
+        print(f"The inventory included {counts['delete_markers']} delete markers.")
+    if progress.failed:
+        print(f'WARNING: {progress.failed} objects could not be deleted, see the errors above.')
+    errors = [job.bucket_name for job in jobs.values() if job.result.get('error')]
+    if errors:
+        print(f"WARNING: unable to finish {', '.join(errors)}, see the errors above.")
 
-    # Delete all object versions and delete markers
-    object_versions = s3_client.list_object_versions(Bucket=bucket_name)
-    
-    to_delete = []
-    
-    if 'Versions' in object_versions:
-        to_delete.extend(
-            [{'Key': obj['Key'], 'VersionId': obj['VersionId']} for obj in object_versions['Versions']]
-        )
-        
-    if 'DeleteMarkers' in object_versions:
-        to_delete.extend(
-            [{'Key': obj['Key'], 'VersionId': obj['VersionId']} for obj in object_versions['DeleteMarkers']]
-        )
-    
-    if to_delete:
-        s3_client.delete_objects(Bucket=bucket_name, Delete={'Objects': to_delete})
-
-    # Delete all multipart uploads
-    multipart_uploads = s3_client.list_multipart_uploads(Bucket=bucket_name)
-    if 'Uploads' in multipart_uploads:
-        for upload in multipart_uploads['Uploads']:
-            s3_client.abort_multipart_upload(
-                Bucket=bucket_name,
-                Key=upload['Key'],
-                UploadId=upload['UploadId']
-            )
-
-    print(f'Deleted all objects and versions from bucket {bucket_name}.')
+def backup_path(bucket_name, backup_file):
+    return backup_file or f'lifecycle-backup-{bucket_name}.json'
+
+def install_expiry_lifecycle(bucket_name, backup_file):
+    s3_client = boto3.client('s3')
+    path = backup_path(bucket_name, backup_file)
+
+    # Back up the existing lifecycle configuration (if any). Don't overwrite an
+    # existing backup, since the bucket might already have our rules on it.
+    if os.path.exists(path):
+        print(f'Backup {path} already exists, leaving it alone.')
+    else:
+        try:
+            rules = s3_client.get_bucket_lifecycle_configuration(Bucket=bucket_name)['Rules']
+        except s3_client.exceptions.ClientError as e:
+            if e.response['Error']['Code'] != 'NoSuchLifecycleConfiguration':
+                raise
+            rules = None
+        with open(path, 'w') as f:
+            json.dump({'Bucket': bucket_name, 'Rules': rules}, f, indent=2, default=str)
+        print(f'Saved existing lifecycle configuration to {path}')
+
+    # Expire everything: current versions, noncurrent versions, incomplete
+    # multipart uploads, and (once they are all that's left) delete markers.
+    # ExpiredObjectDeleteMarker can't share a rule with Days, hence two rules.
+    s3_client.put_bucket_lifecycle_configuration(
+        Bucket=bucket_name,
+        LifecycleConfiguration={'Rules': [
+            {
+                'ID': 'empty-bucket-expire-all',
+                'Filter': {'Prefix': ''},
+                'Status': 'Enabled',
+                'Expiration': {'Days': 1},
+                'NoncurrentVersionExpiration': {'NoncurrentDays': 1},
+                'AbortIncompleteMultipartUpload': {'DaysAfterInitiation': 1},
+            },
+            {
+                'ID': 'empty-bucket-expire-delete-markers',
+                'Filter': {'Prefix': ''},
+                'Status': 'Enabled',
+                'Expiration': {'ExpiredObjectDeleteMarker': True},
+            },
+        ]}
+    )
+    print(f'Installed expiry rules on bucket {bucket_name}. S3 will empty it over the next few days;')
+    print('run this script again with --finish to check, and to restore the original configuration.')
+
+def finish_expiry_lifecycle(bucket_name, backup_file, delete_bucket):
+    s3_client = boto3.client('s3')
+    path = backup_path(bucket_name, backup_file)
+
+    # A single-key probe is enough to tell whether the bucket is empty
+    versions = s3_client.list_object_versions(Bucket=bucket_name, MaxKeys=1)
+    uploads = s3_client.list_multipart_uploads(Bucket=bucket_name, MaxUploads=1)
+    if versions.get('Versions') or versions.get('DeleteMarkers') or uploads.get('Uploads'):
+        print(f'Bucket {bucket_name} is not empty yet, try again later.')
+        return
+
+    if delete_bucket:
+        s3_client.delete_bucket(Bucket=bucket_name)
+        if os.path.exists(path):
+            os.remove(path)
+        print(f'Bucket {bucket_name} is empty, and has been deleted.')
+        return
+
+    # Restore the original lifecycle configuration
+    if not os.path.exists(path):
+        print(f'Bucket {bucket_name} is empty, but there is no backup at {path}, so the lifecycle configuration was left as-is.')
+        return
+    with open(path) as f:
+        backup = json.load(f)
+    if backup['Rules']:
+        s3_client.put_bucket_lifecycle_configuration(Bucket=bucket_name, LifecycleConfiguration={'Rules': backup['Rules']})
+    else:
+        s3_client.delete_bucket_lifecycle(Bucket=bucket_name)
+    os.remove(path)
+    print(f'Bucket {bucket_name} is empty, original lifecycle configuration restored.')
 
 ##################
 # The real stuff #
 ##################
 
-# Region name and bucket name should be included as command line 
+# Region name and bucket name should be included as command line
 # arguments, parsed with argparse
 
 # Initialize the argument parser
 parser = argparse.ArgumentParser(description="A script to delete all S3 objects from a bucket")
-parser.add_argument('-b', '--bucket', type=str, required=True, help='The name of the S3 bucket (ex: my-s3-bucket)')
+buckets = parser.add_mutually_exclusive_group(required=True)
+buckets.add_argument('-b', '--bucket', type=str, help='The name of the S3 bucket (ex: my-s3-bucket)')
+buckets.add_argument('-B', '--bucket-pattern', type=str, help="Empty every bucket whose name matches this wildcard pattern (ex: 'team*-*'), concurrently")
+parser.add_argument('--delete-bucket', action='store_true', help='Delete the bucket(s) too, once empty')
+parser.add_argument('--dry-run', action='store_true', help="List (and count) everything which would be deleted, without deleting anything (not supported with '--strategy lifecycle')")
+parser.add_argument('-w', '--workers', type=int, help=f'Number of concurrent delete_objects calls, shared by all buckets (default: {DEFAULT_WORKERS})')
+parser.add_argument('-l', '--list-workers', type=int, help=f'Number of prefix shards to list concurrently (default: {DEFAULT_LIST_WORKERS})')
+parser.add_argument('-d', '--shard-depth', type=int, default=0, help="Split the bucket into shards by listing '/'-delimited prefixes this many levels deep (default: 0, no sharding)")
+parser.add_argument('-p', '--shard-prefixes', type=str, nargs='+', help='List these prefixes in parallel instead of discovering them (only keys under these prefixes are deleted)')
+parser.add_argument('-s', '--strategy', type=str, choices=['delete', 'lifecycle'], default='delete', help="'delete' deletes objects directly, 'lifecycle' installs lifecycle rules so S3 expires everything for you (default: delete)")
+parser.add_argument('--finish', action='store_true', help="With '--strategy lifecycle', check whether the bucket is empty and, if so, restore its original lifecycle configuration")
+parser.add_argument('--backup-file', type=str, help='Where to save the original lifecycle configuration (default: lifecycle-backup-<bucket>.json)')
+parser.add_argument('-m', '--manifest', type=str, nargs='+', help='Delete the keys in these local S3 Inventory manifest.json or .csv/.csv.gz files instead of listing the bucket')
+parser.add_argument('--inventory-schema', type=str, help="Columns of the .csv/.csv.gz files given to --manifest, as in the manifest's fileSchema (ex: 'Bucket, Key, VersionId, IsLatest, IsDeleteMarker'). Required for data files given without their manifest.json")
 
 # Parse the command line arguments
 args = parser.parse_args()
 
-print('Deleting all objects...')
-delete_all_objects(args.bucket)
-print('Done!')
\ No newline at end of file
+# Options which only make sense for one strategy would otherwise be silently
+# ignored (or worse: --finish would start a delete run, and --dry-run would
+# install the expiry rules for real)
+if args.strategy == 'lifecycle':
+    delete_only = {'--dry-run': args.dry_run, '--manifest': args.manifest, '--inventory-schema': args.inventory_schema, '--shard-depth': args.shard_depth, '--shard-prefixes': args.shard_prefixes,
+                   '--workers': args.workers, '--list-workers': args.list_workers}
+    used = [option for option, value in delete_only.items() if value]
+    if used:
+        parser.error(f"{', '.join(used)} can't be used with --strategy lifecycle")
+elif args.finish:
+    parser.error('--finish can only be used with --strategy lifecycle')
+
+# Inventory columns vary with the inventory's configuration (a current-version
+# only inventory has no VersionId, say), so don't guess them for data files
+if args.manifest and not args.inventory_schema and not all(manifest.endswith('.json') for manifest in args.manifest):
+    parser.error('--inventory-schema is required for inventory data files given without their manifest.json')
+if args.inventory_schema and 'Key' not in [column.strip() for column in args.inventory_schema.split(',')]:
+    parser.error("--inventory-schema must include a 'Key' column")
+
+if args.bucket_pattern:
+    bucket_names = find_buckets(args.bucket_pattern)
+    print(f"Found {len(bucket_names)} bucket(s) matching {args.bucket_pattern}: {', '.join(bucket_names)}")
+    if args.backup_file and len(bucket_names) > 1:
+        parser.error('--backup-file can only be used with a single bucket')
+else:
+    bucket_names = [args.bucket]
+
+if args.strategy == 'lifecycle' and args.finish:
+    print('Checking whether the bucket(s) are empty...')
+    for bucket_name in bucket_names:
+        finish_expiry_lifecycle(bucket_name, args.backup_file, args.delete_bucket)
+elif args.strategy == 'lifecycle':
+    print('Installing lifecycle expiry rules...')
+    for bucket_name in bucket_names:
+        install_expiry_lifecycle(bucket_name, args.backup_file)
+elif bucket_names:
+    print('Deleting all objects...')
+    delete_all_objects(bucket_names, args.workers or DEFAULT_WORKERS, args.list_workers or DEFAULT_LIST_WORKERS, args.shard_depth, args.shard_prefixes, args.manifest, args.inventory_schema, args.delete_bucket, args.dry_run)
+print('Done!')
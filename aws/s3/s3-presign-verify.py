@@ -0,0 +1,124 @@
+#
+# Author: Jeremy Pedersen (and ChatGPT)
+# Updated: 2026-10-19
+#
+# Check that the local presigner in s3_presign.py produces exactly the same
+# URLs as botocore, for a large set of random keys (including unicode and
+# special characters), across several regions and addressing styles, with
+# and without a session token. Also reports how fast each one is.
+#
+# No AWS account is needed: presigning happens entirely offline, using
+# made-up credentials. Exits with status 1 if any URL differs.
+#
+import boto3
+import argparse
+import random
+import sys
+import time
+from botocore.config import Config
+from datetime import datetime, timezone
+from urllib.parse import parse_qs, urlsplit
+
+from s3_presign import S3Presigner, SIGV4_TIMESTAMP
+
+# Keys which have caused trouble for presigners in the past
+EDGE_CASE_KEYS = [
+    'a', 'a b', 'a+b', 'a%2Fb', 'a%20b', '~tilde', 'dir/file.txt', 'dir//file', '/leading-slash',
+    'trailing-slash/', '.', '..', './relative', 'a?b', 'a#b', 'a&b=c', 'a;b', "quote'd", 'double"quote',
+    'back\\slash', 'tab\tkey', 'new\nline', 'caf\u00e9', 'cafe\u0301', '\u65e5\u672c\u8a9e/\u30d5\u30a1\u30a4\u30eb',
+    '\U0001f600 emoji', '\u00a0nbsp', '*', '!$&\'()*+,;=:@', '[brackets]', '{braces}', '<angle>', '|pipe|', '^caret`',
+]
+
+ALPHABETS = [
+    'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789',
+    '-_.~/',
+    ' !"#$%&\'()*+,:;<=>?@[\\]^`{|}',
+    'éüñßåǿ̈',
+    '日本語中文한국어русскийالعربية',
+    '\U0001f600\U0001f680\U0001f4a9☃❤',
+]
+
+CONFIGS = [
+    {'region': 'us-east-1', 'bucket': 'example-bucket', 'style': 'auto'},
+    {'region': 'eu-west-1', 'bucket': 'example-bucket', 'style': 'virtual'},
+    {'region': 'ap-northeast-1', 'bucket': 'example-bucket', 'style': 'path'},
+    {'region': 'us-west-2', 'bucket': 'example.bucket.with.dots', 'style': 'auto'},
+]
+
+#############
+# Functions #
+#############
+
+def random_key(rng):
+    length = rng.randint(1, 200)
+    alphabet = ''.join(rng.sample(ALPHABETS, rng.randint(1, len(ALPHABETS))))
+    return ''.join(rng.choice(alphabet) for _ in range(length))
+
+def make_session(region, token):
+    return boto3.session.Session(
+        aws_access_key_id='AKIDEXAMPLE',
+        aws_secret_access_key='wJalrXUtnFEMI/K7MDENG+bPxRfiCYEXAMPLEKEY',
+        aws_session_token=token,
+        region_name=region
+    )
+
+def botocore_timestamp(url):
+    amz_date = parse_qs(urlsplit(url).query)['X-Amz-Date'][0]
+    return datetime.strptime(amz_date, SIGV4_TIMESTAMP).replace(tzinfo=timezone.utc)
+
+def verify(config, token, keys, expires):
+    session = make_session(config['region'], token)
+    client_config = Config(signature_version='s3v4', s3={'addressing_style': config['style']})
+    s3 = session.client('s3', config=client_config)
+    presigner = S3Presigner.from_session(session, config['bucket'], expires, client_config)
+
+    # Presign everything with botocore first (timed), then locally, using
+    # the same timestamp botocore used for each URL
+    start = time.perf_counter()
+    expected = [s3.generate_presigned_url(
+        ClientMethod='get_object',
+        Params={'Bucket': config['bucket'], 'Key': key},
+        ExpiresIn=expires
+    ) for key in keys]
+    botocore_time = time.perf_counter() - start
+
+    mismatches = []
+    local_time = 0
+    for url, key in zip(expected, keys):
+        presigner.refresh(botocore_timestamp(url))
+        start = time.perf_counter()
+        actual = presigner.presign(key)
+        local_time += time.perf_counter() - start
+        if actual != url:
+            mismatches.append((key, url, actual))
+
+    return mismatches, botocore_time, local_time
+
+##################
+# The real stuff #
+##################
+
+parser = argparse.ArgumentParser(description='Check that the local S3 presigner matches botocore byte-for-byte')
+parser.add_argument('-n', '--count', type=int, default=20000, help='Number of random keys to check per configuration (default: 20000)')
+parser.add_argument('-s', '--seed', type=int, default=0, help='Random seed (default: 0)')
+parser.add_argument('-e', '--expires', type=int, default=43200, help='Expiry to sign with, in seconds (default: 43200)')
+args = parser.parse_args()
+
+rng = random.Random(args.seed)
+keys = EDGE_CASE_KEYS + [random_key(rng) for _ in range(args.count)]
+
+failed = False
+for config in CONFIGS:
+    for token in (None, 'FQoGZXIvYXdzEXAMPLE//////////wEaDEXAMPLETOKEN+/=='):
+        mismatches, botocore_time, local_time = verify(config, token, keys, args.expires)
+        label = f"{config['region']} {config['bucket']} ({config['style']} addressing, {'with' if token else 'without'} session token)"
+        print(f'{label}: {len(keys) - len(mismatches)}/{len(keys)} match, '
+              f'botocore {len(keys) / botocore_time:.0f} URLs/sec, local {len(keys) / local_time:.0f} URLs/sec')
+        for key, expected, actual in mismatches[:5]:
+            print(f'  MISMATCH for key {key!r}:\n    botocore: {expected}\n    local:    {actual}')
+        failed = failed or bool(mismatches)
+
+if failed:
+    print('FAILED: the local presigner does not match botocore.')
+    sys.exit(1)
+print('Done! All URLs match.')
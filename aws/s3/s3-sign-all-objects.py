@@ -1,68 +1,186 @@
 #
 # Author: Jeremy Pedersen (and ChatGPT)
-# Updated: 2023-10-06
+# Updated: 2026-10-19
 #
 # Generate signed URLs for all objects in a bucket, with
-# a 12 hour expiration time
+# a 12 hour expiration time (change it with --expires)
+#
+# Objects are streamed out of the listing (see s3_listing.py) and signed in
+# batches by a pool of processes, and URLs are written out as they are
+# signed, to a CSV or JSON lines file. Only a few batches are in flight at
+# once, so memory use doesn't grow with the size of the bucket. Use
+# --prefix, --suffix and --modified-since to sign only some of the objects.
+#
+# URLs are signed with the local SigV4 presigner in s3_presign.py, which
+# produces the same URLs as botocore, many times faster. It checks itself
+# against botocore on startup, and falls back to botocore if they differ.
+#
+# Very large buckets can be split into prefix "shards" (discovered by
+# delimiter listing down to --shard-depth, or given with --shard-prefixes),
+# each of which is listed by its own worker.
 #
 import boto3
 import csv
 import argparse
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from s3_listing import batches, discover_shards, list_objects
+from s3_presign import S3Presigner
 
 #############
 # Functions #
 #############
 
-def generate_signed_urls(bucket_name, filename):
-    # Open a .csv file called 'urls'
-    csvfile = open(filename, 'w')
-    writer = csv.writer(csvfile)
+def matches(record, suffix, modified_since):
+    if suffix and not record.key.endswith(suffix):
+        return False
+    if modified_since and record.last_modified < modified_since:
+        return False
+    return True
+
+# Each process in the signing pool sets up its own signer, once
+signer = None
+presigner = None
 
-    writer.writerow(['Object Name', 'URL'])
+def init_signer(bucket_name, expires, local_signer):
+    global signer, presigner
+    session = boto3.session.Session()
+    signer = session.client('s3')
+    if local_signer:
+        try:
+            presigner = S3Presigner.from_session(session, bucket_name, expires)
+        except ValueError as e:
+            print(f'Unable to use the local presigner, falling back to botocore: {e}')
 
+def sign_batch(bucket_name, keys, expires):
+    if presigner:
+        # botocore signs each URL with the current time, so we do the same, once per batch
+        presigner.refresh()
+        return [(key, presigner.presign(key)) for key in keys]
+
+    return [(key, signer.generate_presigned_url(
+        ClientMethod='get_object',
+        Params={
+            'Bucket': bucket_name,
+            'Key': key
+        },
+        ExpiresIn=expires
+    )) for key in keys]
+
+def generate_signed_urls(bucket_name, filename, output_format, expires, prefix, suffix, modified_since, list_workers, sign_workers, shard_depth, shard_prefixes, local_signer, batch_size=1000):
     # Initialize the S3 client
     s3 = boto3.client('s3')
 
-    # Iterate over all the objects in the bucket
-    objects = s3.list_objects_v2(Bucket=bucket_name)
-
-    # Check if there are any objects
-    if objects.get('Contents'):
-        for obj in objects['Contents']:
-            # Generate the signed URL
-            url = s3.generate_presigned_url(
-                ClientMethod='get_object',
-                Params={
-                    'Bucket': bucket_name,
-                    'Key': obj['Key']
-                },
-                ExpiresIn=43200 # 12 hours in seconds
-            )
-
-            # Write object name and signed URL into csvfile
-            writer.writerow([obj['Key'], url])
+    # Split the bucket into prefixes which can be listed in parallel
+    if shard_prefixes:
+        shards = [(shard_prefix, False) for shard_prefix in shard_prefixes]
+    elif shard_depth:
+        shards = discover_shards(s3, bucket_name, shard_depth, list_workers, prefix)
     else:
+        shards = [(prefix, False)]
+    if len(shards) > 1:
+        print(f'Listing {len(shards)} prefix shards with {min(list_workers, len(shards))} workers')
+
+    total = 0
+    write_lock = threading.Lock()
+
+    # Bound the number of batches waiting to be signed, so listing can't run
+    # arbitrarily far ahead of signing
+    slots = threading.BoundedSemaphore(sign_workers * 4)
+
+    with open(filename, 'w', newline='') as outfile:
+        if output_format == 'csv':
+            writer = csv.writer(outfile)
+            writer.writerow(['Object Name', 'URL'])
+
+        def write_results(future):
+            nonlocal total
+            try:
+                results = future.result()
+            except Exception as e:
+                print(f'Unable to sign a batch of objects: {e}')
+                return
+            finally:
+                slots.release()
+
+            # Write object name and signed URL into the output file
+            with write_lock:
+                for key, url in results:
+                    if output_format == 'csv':
+                        writer.writerow([key, url])
+                    else:
+                        outfile.write(json.dumps({'key': key, 'url': url}) + '\n')
+                total += len(results)
+
+        def sign_shard(shard):
+            shard_prefix, direct_only = shard
+            keys = (record.key for record in list_objects(s3, bucket_name, shard_prefix, direct_only) if matches(record, suffix, modified_since))
+            for batch in batches(keys, batch_size):
+                slots.acquire()
+                sign_pool.submit(sign_batch, bucket_name, batch, expires).add_done_callback(write_results)
+
+        # List the bucket (one thread per shard) and sign in a pool of processes.
+        # The pool is first used from a listing thread, so its processes are
+        # spawned fresh: forking a process whose other threads are mid-request
+        # (holding locks in boto3/urllib3) can deadlock the child.
+        mp_context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=sign_workers, mp_context=mp_context, initializer=init_signer, initargs=(bucket_name, expires, local_signer)) as sign_pool:
+            with ThreadPoolExecutor(max_workers=list_workers) as executor:
+                for future in [executor.submit(sign_shard, shard) for shard in shards]:
+                    future.result()
+
+    if total == 0:
         print(f'No objects found in the bucket {bucket_name}.')
+    else:
+        print(f'Signed {total} objects.')
+
+def parse_timestamp(value):
+    timestamp = datetime.fromisoformat(value)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp
 
 ##################
 # The real stuff #
 ##################
 
-# Initialize the argument parser
-parser = argparse.ArgumentParser(description="A script to create signed URLs for all objects in an S3 bucket, with a 12 hour expiration time")
-parser.add_argument('-b', '--bucket', type=str, required=True, help='The name of the S3 bucket (ex: my-s3-bucket)')
-parser.add_argument('-o', '--output', type=str, required=False, help='The name of the output .csv file (ex: urls.csv)')
+# The signing pool may start fresh Python processes which re-import this
+# script, so only parse arguments and run when executed directly
+if __name__ == '__main__':
+
+    # Initialize the argument parser
+    parser = argparse.ArgumentParser(description="A script to create signed URLs for all objects in an S3 bucket (by default with a 12 hour expiration time)")
+    parser.add_argument('-b', '--bucket', type=str, required=True, help='The name of the S3 bucket (ex: my-s3-bucket)')
+    parser.add_argument('-o', '--output', type=str, required=False, help='The name of the output .csv or .jsonl file (ex: urls.csv)')
+    parser.add_argument('-f', '--format', type=str, choices=['csv', 'jsonl'], help='Output format (default: based on the output file name, otherwise csv)')
+    parser.add_argument('-e', '--expires', type=int, default=43200, help='How long the URLs stay valid, in seconds (default: 43200, 12 hours)')
+    parser.add_argument('--prefix', type=str, default='', help='Only sign objects whose key starts with this prefix')
+    parser.add_argument('--suffix', type=str, help='Only sign objects whose key ends with this suffix (ex: .mp4)')
+    parser.add_argument('--modified-since', type=parse_timestamp, help='Only sign objects modified at or after this time (ex: 2024-01-31 or 2024-01-31T12:00:00+00:00, UTC if no timezone)')
+    parser.add_argument('-s', '--sign-workers', type=int, default=os.cpu_count(), help='Number of processes used to sign URLs (default: number of CPUs)')
+    parser.add_argument('--botocore-signer', action='store_true', help="Sign with botocore's generate_presigned_url() instead of the (much faster) local presigner in s3_presign.py")
+    parser.add_argument('-l', '--list-workers', type=int, default=8, help='Number of prefix shards to list concurrently (default: 8)')
+    parser.add_argument('-d', '--shard-depth', type=int, default=0, help="Split the bucket into shards by listing '/'-delimited prefixes this many levels deep (default: 0, no sharding)")
+    parser.add_argument('-p', '--shard-prefixes', type=str, nargs='+', help='List these prefixes in parallel instead of discovering them (only keys under these prefixes are signed)')
+
+    # Parse the command line arguments
+    args = parser.parse_args()
 
-# Parse the command line arguments
-args = parser.parse_args()
+    # Default output filename
+    output = 'links.csv'
 
-# Default output filename
-output = 'links.csv'
+    if args.output:
+        output = args.output
 
-if args.output:
-    output = args.output
+    output_format = args.format or ('jsonl' if output.endswith(('.jsonl', '.json')) else 'csv')
 
-# Generate signed URLs
-print('Generating signed URLs..')
-generate_signed_urls(args.bucket, output)
-print('Done!')
\ No newline at end of file
+    # Generate signed URLs
+    print('Generating signed URLs..')
+    generate_signed_urls(args.bucket, output, output_format, args.expires, args.prefix, args.suffix, args.modified_since,
+                         args.list_workers, args.sign_workers, args.shard_depth, args.shard_prefixes, not args.botocore_signer)
+    print('Done!')
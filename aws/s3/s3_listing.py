@@ -0,0 +1,104 @@
+#
+# Author: Jeremy Pedersen (and ChatGPT)
+# Updated: 2026-10-19
+#
+# Streaming bucket listings, shared by s3-delete-all-objects.py and
+# s3-sign-all-objects.py
+#
+# boto3 returns each page of a listing as a list of dicts, several hundred
+# bytes apiece. The listings here yield one small ObjectRecord per object
+# instead, and let go of each page before handing out its records, so memory
+# use stays flat however big the bucket is.
+#
+# Very large buckets can also be split into prefix "shards" (see
+# discover_shards()), each of which can be listed by its own worker.
+#
+from concurrent.futures import ThreadPoolExecutor
+
+#############
+# Functions #
+#############
+
+class ObjectRecord:
+    # One object (or object version, or delete marker). Delete markers have
+    # no size or ETag, and version_id is None when listing without versions.
+    __slots__ = ('key', 'version_id', 'size', 'etag', 'last_modified')
+
+    def __init__(self, key, version_id=None, size=0, etag=None, last_modified=None):
+        self.key = key
+        self.version_id = version_id
+        self.size = size
+        self.etag = etag
+        self.last_modified = last_modified
+
+    def identifier(self):
+        # The form delete_objects expects
+        if self.version_id is None:
+            return {'Key': self.key}
+        return {'Key': self.key, 'VersionId': self.version_id}
+
+def list_objects(s3_client, bucket_name, prefix='', direct_only=False):
+    # Yield every (current) object under a prefix. With direct_only, skip
+    # anything in a "subdirectory" of the prefix.
+    kwargs = {'Bucket': bucket_name, 'Prefix': prefix}
+    if direct_only:
+        kwargs['Delimiter'] = '/'
+
+    paginator = s3_client.get_paginator('list_objects_v2')
+    for page in paginator.paginate(**kwargs):
+        records = [ObjectRecord(obj['Key'], None, obj['Size'], obj.get('ETag'), obj['LastModified']) for obj in page.get('Contents', [])]
+        del page
+        yield from records
+
+def list_versions(s3_client, bucket_name, prefix='', direct_only=False):
+    # Yield every object version and delete marker under a prefix. With
+    # direct_only, skip anything in a "subdirectory" of the prefix.
+    kwargs = {'Bucket': bucket_name, 'Prefix': prefix}
+    if direct_only:
+        kwargs['Delimiter'] = '/'
+
+    paginator = s3_client.get_paginator('list_object_versions')
+    for page in paginator.paginate(**kwargs):
+        records = [ObjectRecord(obj['Key'], obj['VersionId'], obj['Size'], obj.get('ETag'), obj['LastModified']) for obj in page.get('Versions', [])]
+        records.extend(ObjectRecord(obj['Key'], obj['VersionId'], 0, None, obj['LastModified']) for obj in page.get('DeleteMarkers', []))
+        del page
+        yield from records
+
+def list_level(s3_client, bucket_name, prefix, versions=False):
+    # Returns (has_direct_keys, child_prefixes) for one level of the bucket
+    has_direct_keys = False
+    children = []
+    paginator = s3_client.get_paginator('list_object_versions' if versions else 'list_objects_v2')
+    for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix, Delimiter='/'):
+        if page.get('Contents') or page.get('Versions') or page.get('DeleteMarkers'):
+            has_direct_keys = True
+        children.extend(cp['Prefix'] for cp in page.get('CommonPrefixes', []))
+    return has_direct_keys, children
+
+def discover_shards(s3_client, bucket_name, depth, workers, prefix='', versions=False):
+    # Walk the bucket's "directory" tree down to the given depth. Each prefix
+    # at the bottom becomes a shard, and so do keys sitting directly in a
+    # prefix above it. Returns a list of (prefix, direct_only) tuples.
+    shards = []
+    level = [prefix]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for _ in range(depth):
+            next_level = []
+            for prefix, (has_direct_keys, children) in zip(level, executor.map(lambda p: list_level(s3_client, bucket_name, p, versions), level)):
+                if has_direct_keys:
+                    shards.append((prefix, True))
+                next_level.extend(children)
+            level = next_level
+    shards.extend((prefix, False) for prefix in level)
+    return shards
+
+def batches(items, size):
+    # Group a stream of items into lists of (at most) the given size
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -0,0 +1,140 @@
+#
+# Author: Jeremy Pedersen (and ChatGPT)
+# Updated: 2026-10-19
+#
+# A fast, local SigV4 presigner for S3 GET URLs, used by s3-sign-all-objects.py
+#
+# botocore's generate_presigned_url() builds and signs a full request for
+# every key. Here, everything which is the same for every URL (the signing
+# key, the query string, the tail of the canonical request) is computed once,
+# so each URL costs one quote(), one SHA-256 and one HMAC.
+#
+# The presigner learns the endpoint, addressing style and credential scope
+# from a single URL presigned by botocore, and checks that it reproduces that
+# URL exactly before it is used. Run s3-presign-verify.py to compare the two
+# over a large set of random keys.
+#
+import hashlib
+import hmac
+from datetime import datetime, timezone
+from urllib.parse import quote, urlsplit
+
+SIGV4_TIMESTAMP = '%Y%m%dT%H%M%SZ'
+
+# A key which is its own URL encoding, used to find the URL prefix
+PROBE_KEY = 'presign-probe'
+
+#############
+# Functions #
+#############
+
+def sign(key, msg):
+    return hmac.new(key, msg.encode('utf-8'), hashlib.sha256).digest()
+
+def parse_query(query):
+    # Split a query string into (name, raw value) pairs, without decoding
+    return [tuple(pair.split('=', 1)) if '=' in pair else (pair, '') for pair in query.split('&') if pair]
+
+class S3Presigner:
+    def __init__(self, access_key, secret_key, token, region, service, url_prefix, path_prefix, operation_query, expires):
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.token = token
+        self.region = region
+        self.service = service
+        self.url_prefix = url_prefix
+        self.path_prefix = path_prefix
+        self.host = urlsplit(url_prefix).netloc
+        self.operation_query = operation_query
+        self.expires = expires
+        self.timestamp = None
+        self.signing_keys = {}
+        self.refresh()
+
+    @classmethod
+    def from_session(cls, session, bucket_name, expires, config=None):
+        # Presign one URL with botocore and copy its endpoint and scope
+        s3 = session.client('s3', config=config)
+        credentials = session.get_credentials().get_frozen_credentials()
+        probe = s3.generate_presigned_url(
+            ClientMethod='get_object',
+            Params={'Bucket': bucket_name, 'Key': PROBE_KEY},
+            ExpiresIn=expires
+        )
+
+        parts = urlsplit(probe)
+        if not parts.path.endswith(PROBE_KEY):
+            raise ValueError(f'Unexpected presigned URL layout: {probe}')
+
+        params = parse_query(parts.query)
+        auth = dict(params)
+        if auth.get('X-Amz-Algorithm') != 'AWS4-HMAC-SHA256' or auth.get('X-Amz-SignedHeaders') != 'host':
+            raise ValueError(f'Only SigV4 URLs signing just the host header are supported: {probe}')
+
+        # X-Amz-Credential is <access key>/<date>/<region>/<service>/aws4_request
+        _, _, region, service, _ = auth['X-Amz-Credential'].replace('%2F', '/').split('/')
+
+        presigner = cls(
+            credentials.access_key,
+            credentials.secret_key,
+            credentials.token,
+            region,
+            service,
+            f'{parts.scheme}://{parts.netloc}',
+            parts.path[:-len(PROBE_KEY)],
+            [(name, value) for name, value in params if not name.startswith('X-Amz-')],
+            expires
+        )
+
+        # Make sure we produce exactly the same URL botocore did
+        presigner.refresh(datetime.strptime(auth['X-Amz-Date'], SIGV4_TIMESTAMP).replace(tzinfo=timezone.utc))
+        if presigner.presign(PROBE_KEY) != probe:
+            raise ValueError('Local presigner does not match botocore for this configuration')
+        presigner.refresh()
+        return presigner
+
+    def signing_key(self, datestamp):
+        # Derived once per (date, region, service)
+        if datestamp not in self.signing_keys:
+            key = sign(f'AWS4{self.secret_key}'.encode('utf-8'), datestamp)
+            key = sign(key, self.region)
+            key = sign(key, self.service)
+            self.signing_keys[datestamp] = sign(key, 'aws4_request')
+        return self.signing_keys[datestamp]
+
+    def refresh(self, timestamp=None):
+        # Recompute everything which depends on the signing time. Call this
+        # now and then (botocore uses the current time for every URL).
+        timestamp = timestamp or datetime.now(timezone.utc)
+        amz_date = timestamp.strftime(SIGV4_TIMESTAMP)
+        if amz_date == self.timestamp:
+            return
+        self.timestamp = amz_date
+        datestamp = amz_date[:8]
+        scope = f'{datestamp}/{self.region}/{self.service}/aws4_request'
+
+        auth_params = [
+            ('X-Amz-Algorithm', 'AWS4-HMAC-SHA256'),
+            ('X-Amz-Credential', f'{self.access_key}/{scope}'),
+            ('X-Amz-Date', amz_date),
+            ('X-Amz-Expires', str(self.expires)),
+            ('X-Amz-SignedHeaders', 'host'),
+        ]
+        if self.token is not None:
+            auth_params.append(('X-Amz-Security-Token', self.token))
+        auth_params = [(name, quote(value, safe='-_.~')) for name, value in auth_params]
+
+        params = self.operation_query + auth_params
+        canonical_query = '&'.join(f'{name}={value}' for name, value in sorted(params))
+
+        self.query = '&'.join(f'{name}={value}' for name, value in params)
+        self.canonical_suffix = f'\n{canonical_query}\nhost:{self.host}\n\nhost\nUNSIGNED-PAYLOAD'
+        self.string_to_sign_prefix = f'AWS4-HMAC-SHA256\n{amz_date}\n{scope}\n'
+        self.key = self.signing_key(datestamp)
+
+    def presign(self, key):
+        path = self.path_prefix + quote(key, safe='/~')
+        canonical_request = 'GET\n' + path + self.canonical_suffix
+        string_to_sign = self.string_to_sign_prefix + hashlib.sha256(canonical_request.encode('utf-8')).hexdigest()
+        signature = hmac.new(self.key, string_to_sign.encode('utf-8'), hashlib.sha256).hexdigest()
+        return f'{self.url_prefix}{path}?{self.query}&X-Amz-Signature={signature}'
@@ -1,40 +1,155 @@
-# 
+#
 # Author: Jeremy Pedersen (and ChatGPT)
-# Updated: 2023-10-24
+# Updated: 2026-10-19
+#
+# Delete all (finished) transcribe jobs in a given region, or in every
+# region with --all-regions.
+#
+# Jobs are listed page by page (filtered by status on the server side, and
+# by creation time and name on our side), then deleted by a pool of worker
+# threads. Listing finishes first, so deletes can't shift the pages under us.
+# Deletes are spaced out to stay under --rate calls per second per region,
+# and botocore backs off on its own if we are throttled anyway.
 #
-# Terminate all (completed) transcribe jobs in a given region. 
+# Jobs which are still QUEUED or IN_PROGRESS can't be deleted, so by default
+# only COMPLETED and FAILED jobs are.
 #
 import boto3
 import argparse
+import re
+import threading
+import time
+from botocore.config import Config
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 
-def delete_all_transcribe_jobs(region):
-    # Create a Transcribe client for the specified region
-    transcribe = boto3.client('transcribe', region_name=region)
+print_lock = threading.Lock()
 
-    # Loop through the job list until no more jobs are found
-    while True:
+#############
+# Functions #
+#############
 
-        # List all Transcribe jobs
-        response = transcribe.list_transcription_jobs()
+def get_all_regions(region_name):
+    ec2_client = boto3.client('ec2', region_name=region_name)
+    return [region['RegionName'] for region in ec2_client.describe_regions()['Regions']]
 
-        # Check if there are any jobs to delete
-        if 'TranscriptionJobSummaries' not in response:
-            print('No Transcribe jobs found in the specified region.')
-            break
+class RateLimiter:
+    # Spaces calls out so that no more than `rate` start per second, across
+    # all the threads sharing the limiter
+    def __init__(self, rate):
+        self.interval = 1 / rate
+        self.lock = threading.Lock()
+        self.next_call = time.monotonic()
 
-        # Check if the list is empty
-        if len(response['TranscriptionJobSummaries']) == 0:
-            print('Job list is empty, exiting.')
-            break
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            delay = self.next_call - now
+            self.next_call = max(now, self.next_call) + self.interval
+        if delay > 0:
+            time.sleep(delay)
 
-        # Delete each Transcribe job
-        for job in response['TranscriptionJobSummaries']:
-            job_name = job['TranscriptionJobName']
-            print(f"Deleting Transcribe job: {job_name}")
+def list_jobs(transcribe, statuses, created_before, pattern):
+    # Yield the names of matching jobs, one page at a time (the Transcribe
+    # client has no paginators, so follow NextToken by hand)
+    for status in statuses:
+        kwargs = {'Status': status, 'MaxResults': 100}
+        while True:
+            response = transcribe.list_transcription_jobs(**kwargs)
+            for job in response.get('TranscriptionJobSummaries', []):
+                if created_before and job['CreationTime'] >= created_before:
+                    continue
+                if pattern and not pattern.search(job['TranscriptionJobName']):
+                    continue
+                yield job['TranscriptionJobName']
+            if 'NextToken' not in response:
+                break
+            kwargs['NextToken'] = response['NextToken']
+
+def delete_all_transcribe_jobs(region, statuses, created_before, pattern, workers, rate, dry_run):
+    # Create a Transcribe client for the specified region, with enough
+    # connections for every worker
+    config = Config(max_pool_connections=workers, retries={'max_attempts': 10, 'mode': 'adaptive'})
+    transcribe = boto3.session.Session().client('transcribe', region_name=region, config=config)
+    limiter = RateLimiter(rate)
+    deleted = 0
+    failed = 0
+    count_lock = threading.Lock()
+
+    def delete_job(job_name):
+        nonlocal deleted, failed
+        limiter.wait()
+        try:
             transcribe.delete_transcription_job(TranscriptionJobName=job_name)
+        except Exception as e:
+            with print_lock:
+                print(f'[{region}] Unable to delete Transcribe job {job_name}: {e}')
+            with count_lock:
+                failed += 1
+            return
+        with count_lock:
+            deleted += 1
+
+    # A region where Transcribe isn't available (or we aren't allowed to use
+    # it) shouldn't stop the others
+    start = time.monotonic()
+    try:
+        job_names = list(list_jobs(transcribe, statuses, created_before, pattern))
+    except Exception as e:
+        with print_lock:
+            print(f'[{region}] Unable to list Transcribe jobs: {e}')
+        return 0, 0, 0
+    found = len(job_names)
+    if dry_run:
+        with print_lock:
+            for job_name in job_names:
+                print(f'[{region}] Would delete Transcribe job: {job_name}')
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            executor.map(delete_job, job_names)
+
+    elapsed = time.monotonic() - start
+    with print_lock:
+        if found == 0:
+            print(f'[{region}] No matching Transcribe jobs found.')
+        elif dry_run:
+            print(f'[{region}] Found {found} Transcribe jobs to delete.')
+        else:
+            print(f'[{region}] Deleted {deleted} Transcribe jobs in {elapsed:.1f}s ({failed} failed).')
+    return found, deleted, failed
+
+def parse_timestamp(value):
+    timestamp = datetime.fromisoformat(value)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp
+
+##################
+# The real stuff #
+##################
 
 parser = argparse.ArgumentParser(description="Delete all Transcribe jobs in a specified region.")
 parser.add_argument("-r", "--region", required=True, type=str, help="AWS region where Transcribe jobs should be deleted")
+parser.add_argument("-a", "--all-regions", action="store_true", help="Delete jobs in every region (--region is used to look up the list of regions)")
+parser.add_argument("-s", "--status", type=str, nargs='+', choices=['COMPLETED', 'FAILED', 'QUEUED', 'IN_PROGRESS'], default=['COMPLETED', 'FAILED'], help="Only delete jobs with these statuses (default: COMPLETED FAILED)")
+parser.add_argument("--created-before", type=parse_timestamp, help="Only delete jobs created before this time (ex: 2024-01-31 or 2024-01-31T12:00:00+00:00, UTC if no timezone)")
+parser.add_argument("-p", "--pattern", type=str, help="Only delete jobs whose name matches this regular expression")
+parser.add_argument("-w", "--workers", type=int, default=8, help="Number of concurrent delete calls per region (default: 8)")
+parser.add_argument("--rate", type=float, default=5, help="Maximum delete calls per second, per region (default: 5)")
+parser.add_argument("--dry-run", action="store_true", help="Only list the jobs which would be deleted")
 args = parser.parse_args()
 
-delete_all_transcribe_jobs(args.region)
+regions = get_all_regions(args.region) if args.all_regions else [args.region]
+pattern = re.compile(args.pattern) if args.pattern else None
+
+# Each region has its own quotas, so purge them all at once
+with ThreadPoolExecutor(max_workers=len(regions)) as executor:
+    results = list(executor.map(lambda region: delete_all_transcribe_jobs(
+        region, args.status, args.created_before, pattern, args.workers, args.rate, args.dry_run
+    ), regions))
+
+if len(regions) > 1:
+    print('=' * 30)
+    print(f'Found {sum(r[0] for r in results)} jobs across {len(regions)} regions: '
+          f'deleted {sum(r[1] for r in results)}, {sum(r[2] for r in results)} failed.')
+print('Done!')
@@ -0,0 +1,210 @@
+#
+# Author: Jeremy Pedersen (and ChatGPT)
+# Updated: 2026-10-19
+#
+# Delete every kind of Transcribe resource which tends to pile up in an
+# account: transcription jobs, medical transcription jobs, call analytics
+# jobs, custom vocabularies (standard and medical), vocabulary filters and
+# custom language models. Use --types to pick which ones.
+#
+# Each resource type is listed concurrently (in every region, with
+# --all-regions), then deleted by a single pool of worker threads shared by
+# all types. Deletes are spaced out to stay under --rate calls per second per
+# region. Resources which are still being processed (queued or running jobs,
+# vocabularies and models still being built) can't be deleted, and are left
+# alone.
+#
+import boto3
+import argparse
+import re
+import threading
+import time
+from botocore.config import Config
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+# How to list and delete each resource type. The name field is also the
+# delete call's parameter. Where the list call can filter by status, only
+# resources in one of 'statuses' (the ones which can be deleted) are listed.
+RESOURCE_TYPES = {
+    'transcription-jobs': {
+        'list': 'list_transcription_jobs', 'items': 'TranscriptionJobSummaries', 'name': 'TranscriptionJobName',
+        'delete': 'delete_transcription_job', 'created': 'CreationTime',
+        'status_param': 'Status', 'statuses': ['COMPLETED', 'FAILED'],
+    },
+    'medical-transcription-jobs': {
+        'list': 'list_medical_transcription_jobs', 'items': 'MedicalTranscriptionJobSummaries', 'name': 'MedicalTranscriptionJobName',
+        'delete': 'delete_medical_transcription_job', 'created': 'CreationTime',
+        'status_param': 'Status', 'statuses': ['COMPLETED', 'FAILED'],
+    },
+    'call-analytics-jobs': {
+        'list': 'list_call_analytics_jobs', 'items': 'CallAnalyticsJobSummaries', 'name': 'CallAnalyticsJobName',
+        'delete': 'delete_call_analytics_job', 'created': 'CreationTime',
+        'status_param': 'Status', 'statuses': ['COMPLETED', 'FAILED'],
+    },
+    'vocabularies': {
+        'list': 'list_vocabularies', 'items': 'Vocabularies', 'name': 'VocabularyName',
+        'delete': 'delete_vocabulary', 'created': 'LastModifiedTime',
+        'status_param': 'StateEquals', 'statuses': ['READY', 'FAILED'],
+    },
+    'medical-vocabularies': {
+        'list': 'list_medical_vocabularies', 'items': 'Vocabularies', 'name': 'VocabularyName',
+        'delete': 'delete_medical_vocabulary', 'created': 'LastModifiedTime',
+        'status_param': 'StateEquals', 'statuses': ['READY', 'FAILED'],
+    },
+    'vocabulary-filters': {
+        'list': 'list_vocabulary_filters', 'items': 'VocabularyFilters', 'name': 'VocabularyFilterName',
+        'delete': 'delete_vocabulary_filter', 'created': 'LastModifiedTime',
+        'status_param': None, 'statuses': [None],
+    },
+    'language-models': {
+        'list': 'list_language_models', 'items': 'Models', 'name': 'ModelName',
+        'delete': 'delete_language_model', 'created': 'CreateTime',
+        'status_param': 'StatusEquals', 'statuses': ['COMPLETED', 'FAILED'],
+    },
+}
+
+print_lock = threading.Lock()
+
+#############
+# Functions #
+#############
+
+def get_all_regions(region_name):
+    ec2_client = boto3.client('ec2', region_name=region_name)
+    return [region['RegionName'] for region in ec2_client.describe_regions()['Regions']]
+
+class RateLimiter:
+    # Spaces calls out so that no more than `rate` start per second, across
+    # all the threads sharing the limiter
+    def __init__(self, rate):
+        self.interval = 1 / rate
+        self.lock = threading.Lock()
+        self.next_call = time.monotonic()
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            delay = self.next_call - now
+            self.next_call = max(now, self.next_call) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+class TypeStats:
+    # Thread-safe counts and timings for one resource type, across all regions
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.found = 0
+        self.deleted = 0
+        self.failed = 0
+        self.list_seconds = 0
+        self.delete_seconds = 0
+
+    def add(self, **counts):
+        with self.lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+def list_resources(transcribe, spec, created_before, pattern):
+    # Yield the names of matching resources, one page at a time (the
+    # Transcribe client has no paginators, so follow NextToken by hand)
+    for status in spec['statuses']:
+        kwargs = {'MaxResults': 100}
+        if status:
+            kwargs[spec['status_param']] = status
+        while True:
+            response = getattr(transcribe, spec['list'])(**kwargs)
+            for item in response.get(spec['items'], []):
+                if created_before and item[spec['created']] >= created_before:
+                    continue
+                if pattern and not pattern.search(item[spec['name']]):
+                    continue
+                yield item[spec['name']]
+            if 'NextToken' not in response:
+                break
+            kwargs['NextToken'] = response['NextToken']
+
+def purge(regions, resource_types, created_before, pattern, workers, rate, dry_run):
+    config = Config(max_pool_connections=workers, retries={'max_attempts': 10, 'mode': 'adaptive'})
+    clients = {region: boto3.session.Session().client('transcribe', region_name=region, config=config) for region in regions}
+    limiters = {region: RateLimiter(rate) for region in regions}
+    stats = {resource_type: TypeStats() for resource_type in resource_types}
+
+    def delete_resource(region, resource_type, name):
+        spec = RESOURCE_TYPES[resource_type]
+        limiters[region].wait()
+        start = time.monotonic()
+        try:
+            getattr(clients[region], spec['delete'])(**{spec['name']: name})
+        except Exception as e:
+            with print_lock:
+                print(f'[{region}] Unable to delete {resource_type} {name}: {e}')
+            stats[resource_type].add(failed=1, delete_seconds=time.monotonic() - start)
+            return
+        stats[resource_type].add(deleted=1, delete_seconds=time.monotonic() - start)
+
+    def discover(region, resource_type):
+        # List everything first, so deletes can't shift the pages under us,
+        # then queue the deletes on the shared pool
+        start = time.monotonic()
+        try:
+            names = list(list_resources(clients[region], RESOURCE_TYPES[resource_type], created_before, pattern))
+        except Exception as e:
+            with print_lock:
+                print(f'[{region}] Unable to list {resource_type}: {e}')
+            return
+        stats[resource_type].add(found=len(names), list_seconds=time.monotonic() - start)
+        with print_lock:
+            for name in names:
+                print(f"[{region}] {'Would delete' if dry_run else 'Deleting'} {resource_type}: {name}")
+        if not dry_run:
+            for name in names:
+                delete_executor.submit(delete_resource, region, resource_type, name)
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=workers) as delete_executor:
+        with ThreadPoolExecutor(max_workers=workers) as list_executor:
+            for region in regions:
+                for resource_type in resource_types:
+                    list_executor.submit(discover, region, resource_type)
+    return stats, time.monotonic() - start
+
+def parse_timestamp(value):
+    timestamp = datetime.fromisoformat(value)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp
+
+##################
+# The real stuff #
+##################
+
+parser = argparse.ArgumentParser(description="Delete all Transcribe jobs, vocabularies, vocabulary filters and language models in a specified region.")
+parser.add_argument("-r", "--region", required=True, type=str, help="AWS region where Transcribe resources should be deleted")
+parser.add_argument("-a", "--all-regions", action="store_true", help="Delete resources in every region (--region is used to look up the list of regions)")
+parser.add_argument("-t", "--types", type=str, nargs='+', choices=list(RESOURCE_TYPES), default=list(RESOURCE_TYPES), help="Resource types to delete (default: all of them)")
+parser.add_argument("--created-before", type=parse_timestamp, help="Only delete resources created (for vocabularies and filters: last modified) before this time (ex: 2024-01-31, UTC if no timezone)")
+parser.add_argument("-p", "--pattern", type=str, help="Only delete resources whose name matches this regular expression")
+parser.add_argument("-w", "--workers", type=int, default=8, help="Number of concurrent delete calls, shared by all types and regions (default: 8)")
+parser.add_argument("--rate", type=float, default=5, help="Maximum delete calls per second, per region (default: 5)")
+parser.add_argument("--dry-run", action="store_true", help="Only list the resources which would be deleted")
+args = parser.parse_args()
+
+regions = get_all_regions(args.region) if args.all_regions else [args.region]
+pattern = re.compile(args.pattern) if args.pattern else None
+
+print(f"Purging {', '.join(args.types)} in {len(regions)} region(s)...")
+stats, elapsed = purge(regions, args.types, args.created_before, pattern, args.workers, args.rate, args.dry_run)
+
+# Summarize
+print('=' * 30)
+print(f"{'type':<28} {'found':>7} {'deleted':>7} {'failed':>7} {'list s':>8} {'delete s':>9}")
+for resource_type, s in stats.items():
+    print(f'{resource_type:<28} {s.found:>7} {s.deleted:>7} {s.failed:>7} {s.list_seconds:>8.1f} {s.delete_seconds:>9.1f}')
+print('=' * 30)
+total = sum(s.found for s in stats.values())
+if args.dry_run:
+    print(f'Found {total} resources to delete in {elapsed:.1f}s, nothing was deleted.')
+else:
+    print(f'Deleted {sum(s.deleted for s in stats.values())} of {total} resources in {elapsed:.1f}s.')
+print('Done!')
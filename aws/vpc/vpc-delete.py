@@ -1,183 +1,478 @@
 #
 # Author: Jeremy Pedersen (and ChatGPT)
-# Updated: 2023-10-11
+# Updated: 2026-10-19
 #
 # Delete a specific VPC from a given region
 #
+# Everything in the VPC is found up front, with one paginated describe call
+# (filtered by VPC ID) per resource type, so the number of API calls doesn't
+# grow with the number of subnets or instances.
+#
+# Everything in the VPC is modeled as a dependency graph (instances before
+# their subnets, NAT gateways before their EIPs, security group rules before
+# any security group, and everything before the VPC itself). That includes
+# network interfaces left behind by Lambda, EFS, load balancers and so on,
+# which are detached and deleted, and any Elastic IPs still associated with
+# them, which are released. Every resource
+# whose dependencies are gone is deleted at once, by a pool of worker
+# threads, so tearing down a VPC takes about as long as its longest chain of
+# dependencies. Deletes which fail with DependencyViolation (usually because
+# AWS hasn't finished cleaning up something else yet) are retried with
+# backoff.
+#
 import boto3
 import argparse
+import heapq
+import random
+import threading
+import time
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+print_lock = threading.Lock()
 
 #############
 # Functions #
 #############
 
-def delete_vpc(region, vpc_id):
+def log(message):
+    # Resources are deleted from several threads at once, so keep lines whole
+    with print_lock:
+        print(message)
 
-    ec2 = boto3.client('ec2', region_name=region)
+class Node:
+    # One step of the teardown: an action, the names of the nodes which must
+    # have finished (successfully or not) before it can run, and the error
+    # codes which mean "still in use, try again later"
+    def __init__(self, name, action, deps=(), retry_codes=('DependencyViolation',)):
+        self.name = name
+        self.action = action
+        self.deps = set(deps)
+        self.retry_codes = retry_codes
+        self.attempts = 0
+
+def run_node(node, max_attempts, slots):
+    # Returns 'done', 'retry' or 'failed'
+    node.attempts += 1
+    try:
+        with slots:
+            node.action()
+        return 'done'
+    except ClientError as e:
+        if e.response['Error']['Code'] in node.retry_codes and node.attempts < max_attempts:
+            return 'retry'
+        log(f'Unable to delete {node.name}: {e}')
+    except Exception as e:
+        log(f'Unable to delete {node.name}: {e}')
+    return 'failed'
+
+def run_graph(nodes, workers, slots, max_attempts=10):
+    # Run every node whose dependencies have finished, as soon as they have
+    # (and one of the slots shared by all VPCs is free). Failed nodes still
+    # release their dependents, which may well succeed anyway (and if not,
+    # will say why). Returns {name: 'done' or 'failed'}.
+    pending = {node.name: {dep for dep in node.deps if dep in nodes} for node in nodes.values()}
+    dependents = {name: [] for name in nodes}
+    for name, deps in pending.items():
+        for dep in deps:
+            dependents[dep].append(name)
+
+    ready = deque(name for name, deps in pending.items() if not deps)
+    delayed = []
+    running = {}
+    results = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while ready or delayed or running:
+            now = time.monotonic()
+            while delayed and delayed[0][0] <= now:
+                ready.append(heapq.heappop(delayed)[1])
+            while ready:
+                name = ready.popleft()
+                running[executor.submit(run_node, nodes[name], max_attempts, slots)] = name
+
+            timeout = max(0, delayed[0][0] - now) if delayed else None
+            if not running:
+                time.sleep(timeout)
+                continue
+            finished, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+
+            for future in finished:
+                name = running.pop(future)
+                outcome = future.result()
+                if outcome == 'retry':
+                    # Something else still depends on it, try again later
+                    delay = min(30, 2 ** nodes[name].attempts) * random.uniform(0.5, 1.0)
+                    log(f'{name} is still in use, retrying in {delay:.0f}s')
+                    heapq.heappush(delayed, (time.monotonic() + delay, name))
+                    continue
+
+                results[name] = outcome
+                for dependent in dependents[name]:
+                    pending[dependent].discard(name)
+                    if not pending[dependent]:
+                        ready.append(dependent)
+    return results
+
+def chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def describe_all(ec2, operation, key, filters):
+    paginator = ec2.get_paginator(operation)
+    return [item for page in paginator.paginate(Filters=filters) for item in page[key]]
+
+def wait_for_detach(ec2, interface_ids, poll_interval=5, timeout=600):
+    # Poll all the interfaces with one describe call (per 200) until none is
+    # still attached
+    remaining = interface_ids
+    deadline = time.monotonic() + timeout
+    while remaining:
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Network interfaces still attached after {timeout}s: {', '.join(remaining)}")
+        time.sleep(poll_interval)
+        remaining = [eni['NetworkInterfaceId'] for batch in chunks(remaining, 200)
+                     for eni in describe_all(ec2, 'describe_network_interfaces', 'NetworkInterfaces', [{'Name': 'network-interface-id', 'Values': batch}])
+                     if eni['Status'] != 'available']
+
+def discover(ec2, vpc_id):
+    # Find everything in the VPC: one paginated call per resource type, all
+    # run at once
+    vpc_filter = [{'Name': 'vpc-id', 'Values': [vpc_id]}]
+    calls = {
+        'instances': ('describe_instances', 'Reservations', vpc_filter),
+        'nat_gateways': ('describe_nat_gateways', 'NatGateways', vpc_filter),
+        'internet_gateways': ('describe_internet_gateways', 'InternetGateways', [{'Name': 'attachment.vpc-id', 'Values': [vpc_id]}]),
+        'endpoints': ('describe_vpc_endpoints', 'VpcEndpoints', vpc_filter),
+        'route_tables': ('describe_route_tables', 'RouteTables', vpc_filter),
+        'subnets': ('describe_subnets', 'Subnets', vpc_filter),
+        'security_groups': ('describe_security_groups', 'SecurityGroups', vpc_filter),
+        'network_acls': ('describe_network_acls', 'NetworkAcls', vpc_filter),
+        'network_interfaces': ('describe_network_interfaces', 'NetworkInterfaces', vpc_filter),
+    }
+    with ThreadPoolExecutor(max_workers=len(calls)) as executor:
+        futures = {name: executor.submit(describe_all, ec2, *call) for name, call in calls.items()}
+        resources = {name: future.result() for name, future in futures.items()}
+
+    # Every rule of every security group, so they can be revoked by ID (a
+    # filter takes at most 200 values)
+    group_ids = [sg['GroupId'] for sg in resources['security_groups']]
+    resources['security_group_rules'] = [rule for batch in chunks(group_ids, 200)
+                                         for rule in describe_all(ec2, 'describe_security_group_rules', 'SecurityGroupRules', [{'Name': 'group-id', 'Values': batch}])]
+
+    # Elastic IPs can't be filtered by VPC, so pick out the ones attached to
+    # our network interfaces
+    interface_ids = {eni['NetworkInterfaceId'] for eni in resources['network_interfaces']}
+    resources['addresses'] = [address for address in ec2.describe_addresses(Filters=[{'Name': 'domain', 'Values': ['vpc']}])['Addresses']
+                              if address.get('NetworkInterfaceId') in interface_ids]
+
+    resources['instances'] = [inst for reservation in resources['instances'] for inst in reservation['Instances'] if inst['State']['Name'] != 'terminated']
+    resources['nat_gateways'] = [nat for nat in resources['nat_gateways'] if nat['State'] not in ('deleting', 'deleted')]
+    return resources
+
+def build_graph(ec2, vpc_id, resources):
+    # Work out what has to go before what
+    nodes = {}
+
+    def add(name, action, deps=(), **kwargs):
+        nodes[name] = Node(name, action, deps, **kwargs)
+
+    # Instances: terminate them all at once, and wait until they are all gone
+    instances = resources['instances']
+    instance_ids = [inst['InstanceId'] for inst in instances]
+    if instance_ids:
+        def terminate():
+            log(f"Terminating {len(instance_ids)} instance(s): {', '.join(instance_ids)}")
+            for batch in chunks(instance_ids, 1000):
+                ec2.terminate_instances(InstanceIds=batch)
+            for batch in chunks(instance_ids, 1000):
+                ec2.get_waiter('instance_terminated').wait(InstanceIds=batch)
+        add('instances', terminate)
+    instance_nodes = ['instances'] if instance_ids else []
+
+    # NAT Gateways: delete and wait, then release their EIPs
+    nats = resources['nat_gateways']
+    eip_nodes = []
+    for nat in nats:
+        def delete_nat(nat_id=nat['NatGatewayId']):
+            log(f'Deleting NAT gateway {nat_id}')
+            ec2.delete_nat_gateway(NatGatewayId=nat_id)
+            ec2.get_waiter('nat_gateway_deleted').wait(NatGatewayIds=[nat_id])
+        add(f"NAT gateway {nat['NatGatewayId']}", delete_nat)
 
-    print('=' * 30)
-    print(f'Deleting VPC {vpc_id}')
-    print('=' * 30)
-    
-    # Delete NAT Gateways and their associated EIPs
-    for nat in ec2.describe_nat_gateways(Filters=[{'Name':'vpc-id', 'Values':[vpc_id]}])['NatGateways']:
-        try:
-            ec2.delete_nat_gateway(NatGatewayId=nat['NatGatewayId'])
-        except:
-            print(f"unable to delete NAT gateway {nat['NatGatewayId']}")
-        # Wait for the NAT Gateway to be deleted
-        waiter = ec2.get_waiter('nat_gateway_deleted')
-        waiter.wait(NatGatewayIds=[nat['NatGatewayId']])
-        
-        # Release the EIP associated with the NAT Gateway
         for address in nat.get('NatGatewayAddresses', []):
             if 'AllocationId' in address:
+                def release(allocation_id=address['AllocationId']):
+                    ec2.release_address(AllocationId=allocation_id)
+                add(f"EIP {address['AllocationId']}", release, [f"NAT gateway {nat['NatGatewayId']}"])
+                eip_nodes.append(f"EIP {address['AllocationId']}")
+    nat_nodes = [f"NAT gateway {nat['NatGatewayId']}" for nat in nats]
+
+    # Network interfaces left behind by Lambda, EFS, load balancers and the
+    # like: detach them all, wait for them all at once, then delete each one.
+    # (Those belonging to NAT gateways and endpoints go with them, and those
+    # of our instances go with the instances, unless they were kept.)
+    owner_nodes = {address['NetworkInterfaceId']: [f"NAT gateway {nat['NatGatewayId']}"] for nat in nats
+                   for address in nat.get('NatGatewayAddresses', []) if 'NetworkInterfaceId' in address}
+    owner_nodes.update({eni_id: [f"VPC endpoint {endpoint['VpcEndpointId']}"] for endpoint in resources['endpoints']
+                        for eni_id in endpoint.get('NetworkInterfaceIds', [])})
+    interfaces = [eni for eni in resources['network_interfaces'] if eni['NetworkInterfaceId'] not in owner_nodes]
+    # (Some AWS-managed interfaces can't be detached by us, only deleted once
+    # their owner lets go of them, so a failed detach isn't fatal.)
+    to_detach = {eni['NetworkInterfaceId']: eni['Attachment']['AttachmentId'] for eni in interfaces
+                 if eni.get('Attachment', {}).get('Status') in ('attaching', 'attached')
+                 and eni['Attachment'].get('InstanceId') not in instance_ids and eni['Attachment'].get('DeviceIndex') != 0}
+    if to_detach:
+        def detach_interfaces():
+            log(f'Detaching {len(to_detach)} network interface(s)')
+            detaching = []
+            for eni_id, attachment_id in to_detach.items():
                 try:
-                    ec2.release_address(AllocationId=address['AllocationId'])
-                except:
-                    print(f"Unable to release EIP address with ID {address['AllocationId']}, perhaps it has already been deleted?")
+                    ec2.detach_network_interface(AttachmentId=attachment_id, Force=True)
+                    detaching.append(eni_id)
+                except Exception as e:
+                    log(f'Unable to detach network interface {eni_id}: {e}')
+            wait_for_detach(ec2, detaching)
+        add('network interface detachment', detach_interfaces)
 
-    # Detach and delete all gateways associated with the vpc
-    for gw in ec2.describe_internet_gateways(Filters=[{'Name':'attachment.vpc-id', 'Values':[vpc_id]}])['InternetGateways']:
-        for attachment in gw['Attachments']:
+    eni_nodes = {}
+    for eni in interfaces:
+        eni_id = eni['NetworkInterfaceId']
+        attachment = eni.get('Attachment', {})
+        deps = ['network interface detachment'] if eni_id in to_detach else []
+        if attachment.get('InstanceId') in instance_ids:
+            deps += instance_nodes
+        def delete_interface(eni_id=eni_id):
+            log(f'Deleting network interface {eni_id}')
             try:
-                ec2.detach_internet_gateway(InternetGatewayId=gw['InternetGatewayId'], VpcId=attachment['VpcId'])
-            except:
-                print(f"Unable to detach gateway {gw['InternetGatewayId']} from VPC {attachment['VpcId']}, trying to continue anyway...")
-        try:
-            ec2.delete_internet_gateway(InternetGatewayId=gw['InternetGatewayId'])
-        except:
-            print(f"Unable to delete Internet Gateway {gw['InternetGatewayId']}, trying to continue anyway...")
-
-    # Delete all route table associations
-    for rt in ec2.describe_route_tables(Filters=[{'Name':'vpc-id', 'Values':[vpc_id]}])['RouteTables']:
-        for rta in rt.get('Associations', []):
-            if not rta.get('Main', False):
-                try:
-                    ec2.disassociate_route_table(AssociationId=rta['RouteTableAssociationId'])
-                except:
-                    print(f"Unable to disassociate route table {rta['RouteTableAssociationId']} from VPC {vpc_id}, trying to continue anyway...")
-        try:
-            ec2.delete_route_table(RouteTableId=rt['RouteTableId'])
-        except:
-            print(f"Unable to delete route table {rt['RouteTableId']}, trying to continue anyway...")
+                ec2.delete_network_interface(NetworkInterfaceId=eni_id)
+            except ClientError as e:
+                # Deleted along with its instance
+                if e.response['Error']['Code'] != 'InvalidNetworkInterfaceID.NotFound':
+                    raise
+        # An interface which is still detaching (or which its owner, a Lambda
+        # function or load balancer, say, hasn't let go of yet) is in use
+        add(f'network interface {eni_id}', delete_interface, deps, retry_codes=('DependencyViolation', 'InvalidNetworkInterface.InUse'))
+        eni_nodes[eni_id] = f'network interface {eni_id}'
 
-    # Delete any instances, network interfaces, and subnets
-    for subnet in ec2.describe_subnets(Filters=[{'Name':'vpc-id', 'Values':[vpc_id]}])['Subnets']:
-        for instance in ec2.describe_instances(Filters=[{'Name':'subnet-id', 'Values':[subnet['SubnetId']]}])['Reservations']:
-            for inst in instance['Instances']:
-                try:
-                    ec2.terminate_instances(InstanceIds=[inst['InstanceId']])
-                except:
-                    print(f"Unable to terminate EC2 instance {inst['InstanceId']}, trying to continue anyway..")
-                print(f"Terminating instance {inst['InstanceId']}")
-                waiter = ec2.get_waiter('instance_terminated')
-                waiter.wait(InstanceIds=[inst['InstanceId']])
-        try:
-            ec2.delete_subnet(SubnetId=subnet['SubnetId'])
-        except:
-            print(f"Unable to delete subnet {subnet['SubnetId']}, trying to continue anyway..")
-
-    # Delete all security group rules and security groups
-    for sg in ec2.describe_security_groups(Filters=[{'Name':'vpc-id', 'Values':[vpc_id]}])['SecurityGroups']:
-
-        # Function to create a rule for revoking based on the permission
-        def create_revoke_rule(permission):
-            rule = {'IpProtocol': permission['IpProtocol']}
-            if 'FromPort' in permission and 'ToPort' in permission:
-                rule['FromPort'] = permission['FromPort']
-                rule['ToPort'] = permission['ToPort']
-            if 'IpRanges' in permission:
-                rule['IpRanges'] = permission['IpRanges']
-            if 'UserIdGroupPairs' in permission:
-                rule['UserIdGroupPairs'] = permission['UserIdGroupPairs']
-            return rule
-
-        # Delete all inbound rules
-        try:
-            if 'IpPermissions' in sg and sg['IpPermissions']:
-                for permission in sg['IpPermissions']:
-                    rule = create_revoke_rule(permission)
-                    ec2.revoke_security_group_ingress(GroupId=sg['GroupId'], IpPermissions=[rule])
-        except Exception as e:
-            print(f"Error deleting inbound rules for security group with ID {sg['GroupId']}: {e}")
-
-        # Delete all outbound rules
-        if sg['GroupName'] != 'default':
+    # Elastic IPs still associated with anything in the VPC are released
+    # once whatever they were associated with has gone
+    for address in resources['addresses']:
+        if f"EIP {address['AllocationId']}" in nodes:
+            continue
+        deps = owner_nodes.get(address['NetworkInterfaceId']) or [eni_nodes.get(address['NetworkInterfaceId'])] + instance_nodes
+        def release_address(address=address):
+            log(f"Releasing EIP {address['PublicIp']}")
             try:
-                if 'IpPermissionsEgress' in sg and sg['IpPermissionsEgress']:
-                    for permission in sg['IpPermissionsEgress']:
-                        rule = create_revoke_rule(permission)
-                        ec2.revoke_security_group_egress(GroupId=sg['GroupId'], IpPermissions=[rule])
-            except Exception as e:
-                print(f"Error deleting outbound rules for security group with ID {sg['GroupId']}: {e}")
-
-            # Delete the security group itself
-            print(f"Deleting security group {sg['GroupName']}")
+                ec2.disassociate_address(AssociationId=address['AssociationId'])
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'InvalidAssociationID.NotFound':
+                    raise
+            ec2.release_address(AllocationId=address['AllocationId'])
+        add(f"EIP {address['AllocationId']}", release_address, [dep for dep in deps if dep])
+        eip_nodes.append(f"EIP {address['AllocationId']}")
+
+    # Internet Gateways can't be detached while anything in the VPC still has a public address
+    for gw in resources['internet_gateways']:
+        def delete_gateway(gw_id=gw['InternetGatewayId']):
+            log(f'Deleting Internet Gateway {gw_id}')
             try:
-                ec2.delete_security_group(GroupId=sg['GroupId'])
-            except Exception as e:
-                print(f"Unable to delete security group with ID {sg['GroupId']}, error: {e}")
-
-    # Delete Network ACLs and their rules
-    for nacl in ec2.describe_network_acls(Filters=[{'Name':'vpc-id', 'Values':[vpc_id]}])['NetworkAcls']:
-        
-        # Delete inbound rules
-        for entry in nacl['Entries']:
-
-            if not entry['Egress'] and entry['RuleNumber'] != 32767:
-                ec2.delete_network_acl_entry(NetworkAclId=nacl['NetworkAclId'], RuleNumber=entry['RuleNumber'], Egress=False)
-
-        # Delete outbound rules
-        for entry in nacl['Entries']:
-
-            if entry['Egress'] and entry['RuleNumber'] != 32767:
-                ec2.delete_network_acl_entry(NetworkAclId=nacl['NetworkAclId'], RuleNumber=entry['RuleNumber'], Egress=True)
-        
-        # Don't delete the default network ACL, but the rules should be removed
-        if not nacl['IsDefault']:
-            ec2.delete_network_acl(NetworkAclId=nacl['NetworkAclId'])
-
-    # Delete all VPC endpoints associated with the VPC
+                ec2.detach_internet_gateway(InternetGatewayId=gw_id, VpcId=vpc_id)
+            except ClientError as e:
+                # Already detached on an earlier attempt
+                if e.response['Error']['Code'] != 'Gateway.NotAttached':
+                    raise
+            ec2.delete_internet_gateway(InternetGatewayId=gw_id)
+        add(f"Internet Gateway {gw['InternetGatewayId']}", delete_gateway, instance_nodes + nat_nodes + eip_nodes)
+
+    # VPC endpoints (interface endpoints have network interfaces in our subnets)
+    endpoints = resources['endpoints']
+    for endpoint in endpoints:
+        def delete_endpoint(endpoint_id=endpoint['VpcEndpointId']):
+            log(f'Deleting VPC Endpoint {endpoint_id}')
+            ec2.delete_vpc_endpoints(VpcEndpointIds=[endpoint_id])
+        add(f"VPC endpoint {endpoint['VpcEndpointId']}", delete_endpoint)
+    endpoint_nodes = [f"VPC endpoint {endpoint['VpcEndpointId']}" for endpoint in endpoints]
+
+    # Route tables: remove associations, then delete (the main one goes with the VPC)
+    for rt in resources['route_tables']:
+        if any(rta.get('Main', False) for rta in rt.get('Associations', [])):
+            continue
+        def delete_route_table(rt=rt):
+            for rta in rt.get('Associations', []):
+                ec2.disassociate_route_table(AssociationId=rta['RouteTableAssociationId'])
+            ec2.delete_route_table(RouteTableId=rt['RouteTableId'])
+        add(f"route table {rt['RouteTableId']}", delete_route_table)
+
+    # Subnets, once everything inside them is gone
+    subnet_deps = {}
+    for inst in instances:
+        subnet_deps.setdefault(inst.get('SubnetId'), set()).add('instances')
+    for nat in nats:
+        subnet_deps.setdefault(nat.get('SubnetId'), set()).add(f"NAT gateway {nat['NatGatewayId']}")
+    for endpoint in endpoints:
+        for subnet_id in endpoint.get('SubnetIds', []):
+            subnet_deps.setdefault(subnet_id, set()).add(f"VPC endpoint {endpoint['VpcEndpointId']}")
+    for eni in interfaces:
+        subnet_deps.setdefault(eni.get('SubnetId'), set()).add(eni_nodes[eni['NetworkInterfaceId']])
+
+    subnet_nodes = []
+    for subnet in resources['subnets']:
+        subnet_id = subnet['SubnetId']
+        deps = subnet_deps.get(subnet_id, ())
+        def delete_subnet(subnet_id=subnet_id):
+            log(f'Deleting subnet {subnet_id}')
+            ec2.delete_subnet(SubnetId=subnet_id)
+        add(f'subnet {subnet_id}', delete_subnet, deps)
+        subnet_nodes.append(f'subnet {subnet_id}')
+
+    # Security groups: revoke every group's rules first, so no group still
+    # refers to another when we delete it (the default group keeps only those
+    # outbound rules which don't refer to another group, and is deleted with
+    # the VPC)
+    security_groups = resources['security_groups']
+    rules_by_group = {}
+    for rule in resources['security_group_rules']:
+        rules_by_group.setdefault(rule['GroupId'], []).append(rule)
+    rule_nodes = []
+    for sg in security_groups:
+        rules = rules_by_group.get(sg['GroupId'], [])
+        ingress = [rule['SecurityGroupRuleId'] for rule in rules if not rule['IsEgress']]
+        egress = [rule['SecurityGroupRuleId'] for rule in rules if rule['IsEgress'] and (sg['GroupName'] != 'default' or 'ReferencedGroupInfo' in rule)]
+        if not ingress and not egress:
+            continue
+        def revoke_rules(group_id=sg['GroupId'], ingress=ingress, egress=egress):
+            if ingress:
+                ec2.revoke_security_group_ingress(GroupId=group_id, SecurityGroupRuleIds=ingress)
+            if egress:
+                ec2.revoke_security_group_egress(GroupId=group_id, SecurityGroupRuleIds=egress)
+        add(f"rules of security group {sg['GroupId']}", revoke_rules)
+        rule_nodes.append(f"rules of security group {sg['GroupId']}")
+    for sg in security_groups:
+        if sg['GroupName'] == 'default':
+            continue
+        def delete_group(sg=sg):
+            log(f"Deleting security group {sg['GroupName']}")
+            ec2.delete_security_group(GroupId=sg['GroupId'])
+        add(f"security group {sg['GroupId']}", delete_group, rule_nodes + instance_nodes + endpoint_nodes + list(eni_nodes.values()))
+
+    # Network ACLs: remove their rules, and delete them once no subnet uses them
+    # (the default one is kept, and goes with the VPC)
+    for nacl in resources['network_acls']:
+        def delete_nacl(nacl=nacl):
+            for entry in nacl['Entries']:
+                if entry['RuleNumber'] != 32767:
+                    ec2.delete_network_acl_entry(NetworkAclId=nacl['NetworkAclId'], RuleNumber=entry['RuleNumber'], Egress=entry['Egress'])
+            if not nacl['IsDefault']:
+                ec2.delete_network_acl(NetworkAclId=nacl['NetworkAclId'])
+        add(f"network ACL {nacl['NetworkAclId']}", delete_nacl, [] if nacl['IsDefault'] else subnet_nodes)
+
+    # And finally, the VPC itself
+    def delete_vpc():
+        log(f'Deleting VPC {vpc_id}')
+        ec2.delete_vpc(VpcId=vpc_id)
+    add(f'VPC {vpc_id}', delete_vpc, list(nodes))
+
+    return nodes
+
+def get_all_regions(region_name):
+    ec2_client = boto3.client('ec2', region_name=region_name)
+    return [region['RegionName'] for region in ec2_client.describe_regions()['Regions']]
+
+def find_vpcs(region, vpc_id, all_default, tags):
+    # Returns a list of (vpc_id, name) for the VPCs matching the selectors, or
+    # None if the region can't be searched (denied by an SCP, not opted in...),
+    # so one such region doesn't stop the others
+    ec2 = boto3.session.Session().client('ec2', region_name=region)
+    if vpc_id:
+        filters = [{'Name': 'vpc-id', 'Values': [vpc_id]}]
+    elif all_default:
+        filters = [{'Name': 'is-default', 'Values': ['true']}]
+    else:
+        filters = [{'Name': f'tag:{key}', 'Values': [value]} for key, value in tags]
+
+    vpcs = []
     try:
-        endpoints = ec2.describe_vpc_endpoints(Filters=[{'Name':'vpc-id', 'Values':[vpc_id]}])['VpcEndpoints']
-        if endpoints:
-            endpoint_ids = [endpoint['VpcEndpointId'] for endpoint in endpoints]
-            ec2.delete_vpc_endpoints(VpcEndpointIds=endpoint_ids)
+        for vpc in describe_all(ec2, 'describe_vpcs', 'Vpcs', filters):
+            name = next((tag['Value'] for tag in vpc.get('Tags', []) if tag['Key'] == 'Name'), '')
+            vpcs.append((vpc['VpcId'], name))
     except Exception as e:
-        print(f"Error deleting VPC endpoints associated with VPC {vpc_id}: {e}")
-
-    # List all the VPC endpoints for the given VPC
-    response = ec2.describe_vpc_endpoints(Filters=[{'Name': 'vpc-id', 'Values': [vpc_id]}])
-    vpc_endpoints = response['VpcEndpoints']
-    
-    for vpc_endpoint in vpc_endpoints:
-        endpoint_id = vpc_endpoint['VpcEndpointId']
-        try:
-            print(f'Deleting VPC Endpoint {endpoint_id}...')
-            ec2_client.delete_vpc_endpoints(VpcEndpointIds=[endpoint_id])
-            print(f'VPC Endpoint {endpoint_id} deleted successfully!')
-        except Exception as e:
-            print(f'Failed to delete VPC Endpoint {endpoint_id}. Reason: {e}')
-
-    # Delete the vpc
+        log(f'Unable to list VPCs in {region}: {e}')
+        return None
+    return vpcs
+
+def delete_vpc(region, vpc_id, workers, slots):
+
+    ec2 = boto3.session.Session().client('ec2', region_name=region, config=Config(max_pool_connections=workers))
+
+    log(f'Deleting VPC {vpc_id} in {region}')
+
+    start = time.monotonic()
     try:
-        ec2.delete_vpc(VpcId=vpc_id)
+        nodes = build_graph(ec2, vpc_id, discover(ec2, vpc_id))
     except Exception as e:
-        print(f"Unable to delete VPC {vpc_id}, continuing on...")
-        print(f'Error: {e}')
+        log(f'Unable to list the resources in VPC {vpc_id}: {e}')
+        return {'total': 0, 'deleted': 0, 'failed': ['discovery'], 'seconds': time.monotonic() - start}
+    results = run_graph(nodes, workers, slots)
+
+    failed = [name for name, outcome in results.items() if outcome == 'failed']
+    elapsed = time.monotonic() - start
+    log(f'VPC {vpc_id}: deleted {len(results) - len(failed)} of {len(nodes)} resources in {elapsed:.1f}s')
+    if failed:
+        log(f"VPC {vpc_id}: unable to delete {', '.join(failed)}")
+    return {'total': len(nodes), 'deleted': len(results) - len(failed), 'failed': failed, 'seconds': elapsed}
+
+def parse_tag(value):
+    key, sep, tag_value = value.partition('=')
+    if not sep:
+        raise argparse.ArgumentTypeError(f'Expected Key=Value, got {value}')
+    return key, tag_value
 
 ##################
 # The real stuff #
 ##################
 
 # Use argparse to get the region name from the command line
-parser = argparse.ArgumentParser(description='A script to delete all the VPCs in a specified region')
-parser.add_argument('-r', '--region', type=str, required=True, help='Region to delete NAT gateways from')
-parser.add_argument('-v', '--vpc-id', type=str, required=True, help='VPC ID to delete')
+parser = argparse.ArgumentParser(description='A script to delete VPCs (and everything in them) in a specified region')
+parser.add_argument('-r', '--region', type=str, required=True, help='Region to delete VPCs from')
+selectors = parser.add_mutually_exclusive_group(required=True)
+selectors.add_argument('-v', '--vpc-id', type=str, help='VPC ID to delete')
+selectors.add_argument('--all-default', action='store_true', help='Delete the default VPC')
+selectors.add_argument('-t', '--tag', type=parse_tag, action='append', help='Delete every VPC with this tag (ex: Purpose=workshop), can be given more than once')
+parser.add_argument('-a', '--all-regions', action='store_true', help='Look for matching VPCs in every region (--region is used to look up the list of regions)')
+parser.add_argument('-w', '--workers', type=int, default=16, help='Number of resources to delete at once, across all VPCs (default: 16)')
+parser.add_argument('-m', '--max-vpcs', type=int, default=8, help='Number of VPCs to tear down at once (default: 8)')
+parser.add_argument('--dry-run', action='store_true', help='Only list the VPCs which would be deleted')
 
 args = parser.parse_args()
 
-delete_vpc(args.region, args.vpc_id)
+regions = get_all_regions(args.region) if args.all_regions else [args.region]
+with ThreadPoolExecutor(max_workers=len(regions)) as executor:
+    found = list(executor.map(lambda region: find_vpcs(region, args.vpc_id, args.all_default, args.tag), regions))
+vpcs = [(region, vpc_id, name) for region, region_vpcs in zip(regions, found) for vpc_id, name in region_vpcs or []]
+unsearched = [region for region, region_vpcs in zip(regions, found) if region_vpcs is None]
+
+print(f'Found {len(vpcs)} VPC(s) to delete:')
+for region, vpc_id, name in vpcs:
+    print(f'  {region} {vpc_id} {name}')
+if unsearched:
+    print(f"Unable to look for VPCs in {len(unsearched)} region(s): {', '.join(unsearched)}")
+
+if (vpcs or unsearched) and not args.dry_run:
+    # One limit on in-flight deletes, shared by every VPC being torn down
+    slots = threading.BoundedSemaphore(args.workers)
+    with ThreadPoolExecutor(max_workers=args.max_vpcs) as executor:
+        results = list(executor.map(lambda vpc: delete_vpc(vpc[0], vpc[1], args.workers, slots), vpcs))
+
+    # Summarize
+    print('=' * 30)
+    print(f"{'region':<16} {'VPC':<23} {'name':<20} {'deleted':>9} {'seconds':>8}  status")
+    for (region, vpc_id, name), result in zip(vpcs, results):
+        status = f"FAILED: {', '.join(result['failed'])}" if result['failed'] else 'deleted'
+        print(f"{region:<16} {vpc_id:<23} {name[:20]:<20} {result['deleted']:>4}/{result['total']:<4} {result['seconds']:>8.1f}  {status}")
+    for region in unsearched:
+        print(f"{region:<16} {'-':<23} {'':<20} {'-':>9} {'-':>8}  FAILED: unable to list VPCs")
+    print('=' * 30)
 
 print('Done!')
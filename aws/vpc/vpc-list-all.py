@@ -1,50 +1,149 @@
 #
 # Author: Jeremy Pedersen (and ChatGPT)
-# Updated: 2023-10-11
+# Updated: 2026-10-19
 #
-# List all VPCs in a specified region (along with their subnets, 
-# route tables, security groups, and NAT gateways)
+# List all VPCs in a specified region (along with their CIDR blocks,
+# subnets, route tables, security groups, NAT gateways, Internet gateways,
+# VPC endpoints and peering connections)
+#
+# Each resource type is fetched for the whole region with one paginated call
+# (all of them at once), then grouped by VPC, so the number of API calls
+# doesn't grow with the number of VPCs. Use --all-regions to list every
+# region concurrently.
 #
 import boto3
 import argparse
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+# What to fetch for each region: (operation, response key)
+CALLS = {
+    'vpcs': ('describe_vpcs', 'Vpcs'),
+    'subnets': ('describe_subnets', 'Subnets'),
+    'route_tables': ('describe_route_tables', 'RouteTables'),
+    'security_groups': ('describe_security_groups', 'SecurityGroups'),
+    'nat_gateways': ('describe_nat_gateways', 'NatGateways'),
+    'internet_gateways': ('describe_internet_gateways', 'InternetGateways'),
+    'endpoints': ('describe_vpc_endpoints', 'VpcEndpoints'),
+    'peering_connections': ('describe_vpc_peering_connections', 'VpcPeeringConnections'),
+}
 
 #############
 # Functions #
 #############
 
+def get_all_regions(region_name):
+    ec2_client = boto3.client('ec2', region_name=region_name)
+    return [region['RegionName'] for region in ec2_client.describe_regions()['Regions']]
+
+def describe_all(ec2, operation, key):
+    paginator = ec2.get_paginator(operation)
+    return [item for page in paginator.paginate() for item in page[key]]
+
+def get_name(resource):
+    return next((tag['Value'] for tag in resource.get('Tags', []) if tag['Key'] == 'Name'), '')
+
 def list_vpcs(region):
-    ec2 = boto3.resource('ec2', region_name=region)
-    
-    for vpc in ec2.vpcs.all():
-        print(f'VPC ID: {vpc.id}')
-
-        # Get the VPC name if available
-        tags = {tag['Key']: tag['Value'] for tag in vpc.tags or []}
-        name = tags.get('Name', '')
-        print(f'VPC Name: {name}')
-        
-        # List Subnets
+    # Fetch everything in the region at once, then group it by VPC. A region
+    # we can't look at (denied by an SCP, not opted in...) is skipped, with a
+    # message on stderr so --format json output stays valid.
+    ec2 = boto3.session.Session().client('ec2', region_name=region)
+    try:
+        with ThreadPoolExecutor(max_workers=len(CALLS)) as executor:
+            futures = {name: executor.submit(describe_all, ec2, *call) for name, call in CALLS.items()}
+            resources = {name: future.result() for name, future in futures.items()}
+    except Exception as e:
+        print(f'Unable to list VPCs in {region}: {e}', file=sys.stderr)
+        return []
+
+    vpcs = {}
+    for vpc in resources['vpcs']:
+        vpcs[vpc['VpcId']] = {
+            'Region': region,
+            'VpcId': vpc['VpcId'],
+            'Name': get_name(vpc),
+            'IsDefault': vpc.get('IsDefault', False),
+            'CidrBlocks': [assoc['CidrBlock'] for assoc in vpc.get('CidrBlockAssociationSet', [])]
+                          + [assoc['Ipv6CidrBlock'] for assoc in vpc.get('Ipv6CidrBlockAssociationSet', [])],
+            'Subnets': [],
+            'RouteTables': [],
+            'SecurityGroups': [],
+            'NatGateways': [],
+            'InternetGateways': [],
+            'Endpoints': [],
+            'PeeringConnections': [],
+        }
+
+    def add(vpc_id, section, item):
+        if vpc_id in vpcs:
+            vpcs[vpc_id][section].append(item)
+
+    for subnet in resources['subnets']:
+        add(subnet['VpcId'], 'Subnets', {'SubnetId': subnet['SubnetId'], 'Name': get_name(subnet), 'CidrBlock': subnet['CidrBlock'], 'AvailabilityZone': subnet['AvailabilityZone']})
+    for rt in resources['route_tables']:
+        add(rt['VpcId'], 'RouteTables', {'RouteTableId': rt['RouteTableId'], 'Main': any(a.get('Main', False) for a in rt.get('Associations', []))})
+    for sg in resources['security_groups']:
+        add(sg['VpcId'], 'SecurityGroups', {'GroupId': sg['GroupId'], 'GroupName': sg['GroupName']})
+    for nat in resources['nat_gateways']:
+        if nat['State'] != 'deleted':
+            add(nat['VpcId'], 'NatGateways', {'NatGatewayId': nat['NatGatewayId'], 'State': nat['State'], 'SubnetId': nat.get('SubnetId')})
+    for gw in resources['internet_gateways']:
+        for attachment in gw.get('Attachments', []):
+            add(attachment['VpcId'], 'InternetGateways', {'InternetGatewayId': gw['InternetGatewayId'], 'State': attachment.get('State')})
+    for endpoint in resources['endpoints']:
+        add(endpoint['VpcId'], 'Endpoints', {'VpcEndpointId': endpoint['VpcEndpointId'], 'ServiceName': endpoint['ServiceName'], 'Type': endpoint.get('VpcEndpointType')})
+    for peering in resources['peering_connections']:
+        status = peering.get('Status', {}).get('Code')
+        if status in ('deleted', 'rejected', 'expired', 'failed'):
+            continue
+        requester = peering.get('RequesterVpcInfo', {})
+        accepter = peering.get('AccepterVpcInfo', {})
+        for side, other in ((requester, accepter), (accepter, requester)):
+            add(side.get('VpcId'), 'PeeringConnections', {
+                'VpcPeeringConnectionId': peering['VpcPeeringConnectionId'],
+                'PeerVpcId': other.get('VpcId'),
+                'PeerRegion': other.get('Region'),
+                'PeerOwnerId': other.get('OwnerId'),
+                'Status': status,
+            })
+
+    return list(vpcs.values())
+
+def print_text(vpcs):
+    for vpc in vpcs:
+        print(f"VPC ID: {vpc['VpcId']} ({vpc['Region']}{', default' if vpc['IsDefault'] else ''})")
+        print(f"VPC Name: {vpc['Name']}")
+        print(f"CIDR Blocks: {', '.join(vpc['CidrBlocks'])}")
         print('Subnets:')
-        for subnet in vpc.subnets.all():
-            print(f"  - {subnet.id}")
-        
-        # List Route Tables
+        for subnet in vpc['Subnets']:
+            print(f"  - {subnet['SubnetId']} {subnet['CidrBlock']} {subnet['AvailabilityZone']} {subnet['Name']}")
         print('Route Tables:')
-        for rt in vpc.route_tables.all():
-            print(f"  - {rt.id}")
-
-        # List Security Groups
+        for rt in vpc['RouteTables']:
+            print(f"  - {rt['RouteTableId']}{' (main)' if rt['Main'] else ''}")
         print('Security Groups:')
-        for sg in vpc.security_groups.all():
-            print(f"  - {sg.id} ({sg.group_name})")
-        
-        # List NAT Gateways
+        for sg in vpc['SecurityGroups']:
+            print(f"  - {sg['GroupId']} ({sg['GroupName']})")
         print('NAT Gateways:')
-        nat_gateways = boto3.client('ec2', region_name=region).describe_nat_gateways(Filters=[{'Name':'vpc-id', 'Values':[vpc.id]}])
-        for nat in nat_gateways['NatGateways']:
-            print(f"  - {nat['NatGatewayId']}")
-        
-        print("="*40)
+        for nat in vpc['NatGateways']:
+            print(f"  - {nat['NatGatewayId']} ({nat['State']})")
+        print('Internet Gateways:')
+        for gw in vpc['InternetGateways']:
+            print(f"  - {gw['InternetGatewayId']}")
+        print('VPC Endpoints:')
+        for endpoint in vpc['Endpoints']:
+            print(f"  - {endpoint['VpcEndpointId']} {endpoint['ServiceName']} ({endpoint['Type']})")
+        print('Peering Connections:')
+        for peering in vpc['PeeringConnections']:
+            print(f"  - {peering['VpcPeeringConnectionId']} to {peering['PeerVpcId']} ({peering['Status']})")
+        print("=" * 40)
+
+def print_table(vpcs):
+    print(f"{'region':<16} {'VPC':<23} {'name':<20} {'CIDR blocks':<30} {'subnets':>7} {'RTs':>4} {'SGs':>4} {'NATs':>4} {'IGWs':>4} {'VPCEs':>5} {'peers':>5}")
+    for vpc in vpcs:
+        print(f"{vpc['Region']:<16} {vpc['VpcId']:<23} {vpc['Name'][:20]:<20} {','.join(vpc['CidrBlocks']):<30} "
+              f"{len(vpc['Subnets']):>7} {len(vpc['RouteTables']):>4} {len(vpc['SecurityGroups']):>4} {len(vpc['NatGateways']):>4} "
+              f"{len(vpc['InternetGateways']):>4} {len(vpc['Endpoints']):>5} {len(vpc['PeeringConnections']):>5}")
 
 ##################
 # The real stuff #
@@ -53,6 +152,17 @@ def list_vpcs(region):
 # Parse command line arguments
 parser = argparse.ArgumentParser(description='List all VPCs in an AWS region.')
 parser.add_argument('-r', '--region', type=str, required=True, help='AWS region')
+parser.add_argument('-a', '--all-regions', action='store_true', help='List VPCs in every region (--region is used to look up the list of regions)')
+parser.add_argument('-f', '--format', type=str, choices=['text', 'table', 'json'], default='text', help='Output format (default: text)')
 args = parser.parse_args()
 
-list_vpcs(args.region)
+regions = get_all_regions(args.region) if args.all_regions else [args.region]
+with ThreadPoolExecutor(max_workers=len(regions)) as executor:
+    vpcs = [vpc for region_vpcs in executor.map(list_vpcs, regions) for vpc in region_vpcs]
+
+if args.format == 'json':
+    print(json.dumps(vpcs, indent=2))
+elif args.format == 'table':
+    print_table(vpcs)
+else:
+    print_text(vpcs)
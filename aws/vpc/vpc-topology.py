@@ -0,0 +1,273 @@
+#
+# Author: Jeremy Pedersen (and ChatGPT)
+# Updated: 2026-10-19
+#
+# Export the VPC topology of a region as a graph (JSON, and optionally a
+# Graphviz DOT file), or compare two saved snapshots.
+#
+# The graph has a node for every VPC, subnet, route table, Internet gateway,
+# NAT gateway, VPC endpoint, network interface, security group and peering
+# connection, and edges for what sits in / is attached to / routes to /
+# references what. Everything is fetched with one paginated describe call
+# per resource type for the whole region (all of them at once).
+#
+# Snapshots are compared by key (node ID, or source, target, kind and label
+# for an edge), in a single pass over each, so diffing is quick even for big
+# accounts, and doesn't need to talk to AWS at all:
+#
+#   python vpc-topology.py -r us-east-1 -o before.json
+#   (run vpc-delete.py, say)
+#   python vpc-topology.py -r us-east-1 -o after.json --dot after.dot
+#   python vpc-topology.py --diff before.json after.json
+#
+import boto3
+import argparse
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+# What to fetch for each region: (operation, response key)
+CALLS = {
+    'vpcs': ('describe_vpcs', 'Vpcs'),
+    'subnets': ('describe_subnets', 'Subnets'),
+    'route_tables': ('describe_route_tables', 'RouteTables'),
+    'internet_gateways': ('describe_internet_gateways', 'InternetGateways'),
+    'nat_gateways': ('describe_nat_gateways', 'NatGateways'),
+    'endpoints': ('describe_vpc_endpoints', 'VpcEndpoints'),
+    'network_interfaces': ('describe_network_interfaces', 'NetworkInterfaces'),
+    'security_groups': ('describe_security_groups', 'SecurityGroups'),
+    'security_group_rules': ('describe_security_group_rules', 'SecurityGroupRules'),
+    'peering_connections': ('describe_vpc_peering_connections', 'VpcPeeringConnections'),
+}
+
+# Graphviz shape for each node type
+SHAPES = {
+    'vpc': 'box3d', 'subnet': 'box', 'route-table': 'note', 'internet-gateway': 'house', 'nat-gateway': 'invhouse',
+    'endpoint': 'cds', 'network-interface': 'ellipse', 'security-group': 'octagon', 'peering-connection': 'diamond',
+}
+
+# Fields of a route which can hold its target
+ROUTE_TARGETS = (
+    'GatewayId', 'NatGatewayId', 'NetworkInterfaceId', 'VpcPeeringConnectionId', 'TransitGatewayId',
+    'InstanceId', 'EgressOnlyInternetGatewayId', 'LocalGatewayId',
+)
+
+#############
+# Functions #
+#############
+
+def describe_all(ec2, operation, key):
+    paginator = ec2.get_paginator(operation)
+    return [item for page in paginator.paginate() for item in page[key]]
+
+def get_name(resource):
+    return next((tag['Value'] for tag in resource.get('Tags', []) if tag['Key'] == 'Name'), '')
+
+class Graph:
+    # Nodes keyed by resource ID, edges keyed by (source, target, kind, label)
+    def __init__(self):
+        self.nodes = {}
+        self.edges = {}
+
+    def add_node(self, node_id, node_type, vpc_id, name='', **attrs):
+        self.nodes[node_id] = {'id': node_id, 'type': node_type, 'vpc': vpc_id, 'name': name, 'attrs': attrs}
+
+    def add_edge(self, source, target, kind, label='', **attrs):
+        if source and target:
+            self.edges[(source, target, kind, label)] = {'source': source, 'target': target, 'kind': kind, 'label': label, 'attrs': attrs}
+
+def build_graph(region, vpc_ids=None):
+    ec2 = boto3.client('ec2', region_name=region)
+    with ThreadPoolExecutor(max_workers=len(CALLS)) as executor:
+        futures = {name: executor.submit(describe_all, ec2, *call) for name, call in CALLS.items()}
+        resources = {name: future.result() for name, future in futures.items()}
+
+    def wanted(vpc_id):
+        return vpc_ids is None or vpc_id in vpc_ids
+
+    graph = Graph()
+    for vpc in resources['vpcs']:
+        if wanted(vpc['VpcId']):
+            cidrs = [a['CidrBlock'] for a in vpc.get('CidrBlockAssociationSet', [])] + [a['Ipv6CidrBlock'] for a in vpc.get('Ipv6CidrBlockAssociationSet', [])]
+            graph.add_node(vpc['VpcId'], 'vpc', vpc['VpcId'], get_name(vpc), cidrs=cidrs, default=vpc.get('IsDefault', False))
+
+    for subnet in resources['subnets']:
+        if wanted(subnet['VpcId']):
+            graph.add_node(subnet['SubnetId'], 'subnet', subnet['VpcId'], get_name(subnet), cidr=subnet['CidrBlock'], az=subnet['AvailabilityZone'])
+            graph.add_edge(subnet['SubnetId'], subnet['VpcId'], 'in')
+
+    for rt in resources['route_tables']:
+        if not wanted(rt['VpcId']):
+            continue
+        main = any(a.get('Main', False) for a in rt.get('Associations', []))
+        graph.add_node(rt['RouteTableId'], 'route-table', rt['VpcId'], get_name(rt), main=main)
+        graph.add_edge(rt['RouteTableId'], rt['VpcId'], 'in')
+        for association in rt.get('Associations', []):
+            graph.add_edge(rt['RouteTableId'], association.get('SubnetId'), 'associated')
+        for route in rt.get('Routes', []):
+            destination = route.get('DestinationCidrBlock') or route.get('DestinationIpv6CidrBlock') or route.get('DestinationPrefixListId')
+            for field in ROUTE_TARGETS:
+                if route.get(field) and route[field] != 'local':
+                    graph.add_edge(rt['RouteTableId'], route[field], 'route', destination, state=route.get('State'))
+
+    for gw in resources['internet_gateways']:
+        for attachment in gw.get('Attachments', []):
+            if wanted(attachment['VpcId']):
+                graph.add_node(gw['InternetGatewayId'], 'internet-gateway', attachment['VpcId'], get_name(gw))
+                graph.add_edge(gw['InternetGatewayId'], attachment['VpcId'], 'attached', state=attachment.get('State'))
+
+    for nat in resources['nat_gateways']:
+        if nat['State'] != 'deleted' and wanted(nat['VpcId']):
+            public_ips = [address['PublicIp'] for address in nat.get('NatGatewayAddresses', []) if 'PublicIp' in address]
+            graph.add_node(nat['NatGatewayId'], 'nat-gateway', nat['VpcId'], get_name(nat), state=nat['State'], public_ips=public_ips)
+            graph.add_edge(nat['NatGatewayId'], nat.get('SubnetId'), 'in')
+
+    for endpoint in resources['endpoints']:
+        if not wanted(endpoint['VpcId']):
+            continue
+        graph.add_node(endpoint['VpcEndpointId'], 'endpoint', endpoint['VpcId'], get_name(endpoint),
+                       service=endpoint['ServiceName'], endpoint_type=endpoint.get('VpcEndpointType'), state=endpoint.get('State'))
+        graph.add_edge(endpoint['VpcEndpointId'], endpoint['VpcId'], 'in')
+        for subnet_id in endpoint.get('SubnetIds', []):
+            graph.add_edge(endpoint['VpcEndpointId'], subnet_id, 'in')
+
+    for eni in resources['network_interfaces']:
+        if not wanted(eni['VpcId']):
+            continue
+        attachment = eni.get('Attachment', {})
+        graph.add_node(eni['NetworkInterfaceId'], 'network-interface', eni['VpcId'], get_name(eni),
+                       interface_type=eni.get('InterfaceType'), status=eni.get('Status'), private_ip=eni.get('PrivateIpAddress'),
+                       public_ip=eni.get('Association', {}).get('PublicIp'), instance=attachment.get('InstanceId'),
+                       description=eni.get('Description', ''))
+        graph.add_edge(eni['NetworkInterfaceId'], eni['SubnetId'], 'in')
+        for group in eni.get('Groups', []):
+            graph.add_edge(eni['NetworkInterfaceId'], group['GroupId'], 'uses')
+
+    group_vpcs = {}
+    for sg in resources['security_groups']:
+        group_vpcs[sg['GroupId']] = sg.get('VpcId')
+        if wanted(sg.get('VpcId')):
+            graph.add_node(sg['GroupId'], 'security-group', sg.get('VpcId'), sg['GroupName'], description=sg.get('Description', ''))
+            graph.add_edge(sg['GroupId'], sg.get('VpcId'), 'in')
+
+    for rule in resources['security_group_rules']:
+        referenced = rule.get('ReferencedGroupInfo', {}).get('GroupId')
+        if referenced and wanted(group_vpcs.get(rule['GroupId'])):
+            direction = 'egress' if rule['IsEgress'] else 'ingress'
+            ports = f"{rule.get('IpProtocol')}:{rule.get('FromPort')}-{rule.get('ToPort')}"
+            graph.add_edge(rule['GroupId'], referenced, 'references', f'{direction} {ports}', rule_id=rule['SecurityGroupRuleId'])
+
+    for peering in resources['peering_connections']:
+        status = peering.get('Status', {}).get('Code')
+        if status in ('deleted', 'rejected', 'expired', 'failed'):
+            continue
+        requester = peering.get('RequesterVpcInfo', {}).get('VpcId')
+        accepter = peering.get('AccepterVpcInfo', {}).get('VpcId')
+        if not (wanted(requester) or wanted(accepter)):
+            continue
+        graph.add_node(peering['VpcPeeringConnectionId'], 'peering-connection', requester if wanted(requester) else accepter, get_name(peering), status=status)
+        graph.add_edge(peering['VpcPeeringConnectionId'], requester, 'requester')
+        graph.add_edge(peering['VpcPeeringConnectionId'], accepter, 'accepter')
+
+    return graph
+
+def save_snapshot(graph, region, filename):
+    snapshot = {
+        'region': region,
+        'created': datetime.now(timezone.utc).isoformat(),
+        'nodes': list(graph.nodes.values()),
+        'edges': list(graph.edges.values()),
+    }
+    with open(filename, 'w') as f:
+        json.dump(snapshot, f, indent=2, default=str)
+
+def dot_quote(*lines):
+    # A quoted DOT string, one line per argument
+    return '"' + '\\n'.join(str(line).replace('\\', '\\\\').replace('"', '\\"') for line in lines if line) + '"'
+
+def write_dot(graph, filename):
+    # One cluster per VPC. Route targets outside the graph (transit gateways,
+    # instances...) still get a plain node, so the edge has somewhere to go.
+    with open(filename, 'w') as f:
+        f.write('digraph vpcs {\n  rankdir=LR;\n  node [fontsize=10];\n  edge [fontsize=8];\n')
+        by_vpc = {}
+        for node in graph.nodes.values():
+            by_vpc.setdefault(node['vpc'], []).append(node)
+        for vpc_id, nodes in by_vpc.items():
+            f.write(f'  subgraph {dot_quote(f"cluster_{vpc_id}")} {{\n    label={dot_quote(vpc_id)};\n')
+            for node in nodes:
+                f.write(f"    {dot_quote(node['id'])} [shape={SHAPES.get(node['type'], 'ellipse')}, label={dot_quote(node['id'], node['name'])}];\n")
+            f.write('  }\n')
+        for edge in graph.edges.values():
+            if edge['target'] not in graph.nodes:
+                f.write(f"  {dot_quote(edge['target'])} [shape=plaintext];\n")
+            style = ', style=dashed' if edge['kind'] in ('references', 'uses') else ''
+            label = f"{edge['kind']} {edge['label']}".strip()
+            f.write(f"  {dot_quote(edge['source'])} -> {dot_quote(edge['target'])} [label={dot_quote(label)}{style}];\n")
+        f.write('}\n')
+
+def diff_snapshots(old_file, new_file):
+    # Index both snapshots by key, then walk each once. Returns the number
+    # of differences.
+    with open(old_file) as f:
+        old = json.load(f)
+    with open(new_file) as f:
+        new = json.load(f)
+
+    def edge_key(edge):
+        return (edge['source'], edge['target'], edge['kind'], edge['label'])
+
+    changes = 0
+    for kind, key, describe in (('nodes', lambda n: n['id'], lambda n: f"{n['type']} {n['id']} {n['name']}".strip()),
+                                ('edges', edge_key, lambda e: f"{e['source']} -{e['kind']}-> {e['target']} {e['label']}".strip())):
+        old_items = {key(item): item for item in old[kind]}
+        new_items = {key(item): item for item in new[kind]}
+        for item_key, item in old_items.items():
+            if item_key not in new_items:
+                print(f'- {describe(item)}')
+                changes += 1
+        for item_key, item in new_items.items():
+            if item_key not in old_items:
+                print(f'+ {describe(item)}')
+                changes += 1
+                continue
+            old_item = old_items[item_key]
+            fields = sorted(set(old_item['attrs']) | set(item['attrs']))
+            if kind == 'nodes':
+                fields = ['name'] + fields
+            for field in fields:
+                before = old_item.get(field, old_item['attrs'].get(field))
+                after = item.get(field, item['attrs'].get(field))
+                if before != after:
+                    print(f'~ {describe(item)}: {field} {before!r} -> {after!r}')
+                    changes += 1
+    return changes
+
+##################
+# The real stuff #
+##################
+
+parser = argparse.ArgumentParser(description='Export the VPC topology of a region as a graph, or compare two saved snapshots.')
+parser.add_argument('-r', '--region', type=str, help='AWS region to export')
+parser.add_argument('-v', '--vpc-id', type=str, nargs='+', help='Only export these VPCs (default: all of them)')
+parser.add_argument('-o', '--output', type=str, default='vpc-topology.json', help='JSON snapshot to write (default: vpc-topology.json)')
+parser.add_argument('--dot', type=str, help='Also write the graph to this Graphviz DOT file (render with: dot -Tsvg in.dot -o out.svg)')
+parser.add_argument('--diff', type=str, nargs=2, metavar=('OLD', 'NEW'), help='Compare two saved snapshots instead of exporting')
+args = parser.parse_args()
+
+if args.diff:
+    changes = diff_snapshots(*args.diff)
+    print(f'{changes} difference(s).')
+    sys.exit(1 if changes else 0)
+
+if not args.region:
+    parser.error('--region is required unless --diff is given')
+
+graph = build_graph(args.region, set(args.vpc_id) if args.vpc_id else None)
+save_snapshot(graph, args.region, args.output)
+print(f'Saved {len(graph.nodes)} nodes and {len(graph.edges)} edges to {args.output}')
+if args.dot:
+    write_dot(graph, args.dot)
+    print(f'Saved Graphviz graph to {args.dot}')
+print('Done!')